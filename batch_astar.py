@@ -0,0 +1,290 @@
+# batch_astar.py
+# Weighted A* that expands the open list in batches and scores the
+# children of a whole batch with a few NumPy operations.
+#
+# solvers.solve_astar pays interpreter overhead per child for the Zobrist
+# key, the heuristic update and the heap priority. Here up to `batch`
+# nodes are popped at once, their children are generated as usual, and
+# the children's flipped state bits become one boolean matrix. Keys
+# (XOR of the flipped bits' Zobrist words), heuristic values (row costs
+# or rank censuses as matrix products) and integer priorities are then
+# computed for the whole batch at once; only duplicate detection and the
+# heap pushes stay per child.
+#
+# NumPy is optional: without it solve_astar_batch runs solvers.solve_astar.
+#
+# Measured on seeds 0-79 (memo off), this is still slower than
+# solvers.solve_astar: about 63k against 92k nodes/s with the complement
+# heuristic, and it expands ~16% more nodes, since a batch pops nodes a
+# one-at-a-time search would never reach. Move generation dominates both,
+# and NumPy cannot take it over. So batch_solve and bench_suite do not
+# offer it; it is kept for experiments.
+import heapq
+import time
+from array import array
+
+import config
+import engine
+import solvers
+from heuristics import SLOT_COST, get_heuristic
+from transposition import STATE_BITS, ZOBRIST, zobrist_hash
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+NAME = "A* batch"
+
+# Bits per rank in a packed rank census (at most 4 cards of a rank)
+CENSUS_BITS = 3
+CENSUS_MASK = (1 << CENSUS_BITS) - 1
+
+if HAS_NUMPY:
+    _SHIFTS = np.arange(STATE_BITS, dtype=np.uint64)
+    _ZOBRIST = np.array(ZOBRIST, dtype=np.uint64)
+    _SLOT_COST = np.array(SLOT_COST)
+    _CENSUS_SHIFTS = np.arange(0, CENSUS_BITS * 14, CENSUS_BITS, dtype=np.int64)
+
+def state_bits(states):
+    """Boolean matrix, one row per packed state, one column per state bit."""
+    return (np.asarray(states, dtype=np.uint64)[:, None] >> _SHIFTS) & np.uint64(1) != 0
+
+def batch_keys(parent_keys, flipped):
+    """Zobrist keys of the children: each parent key with the flipped bits' words folded in."""
+    words = np.where(flipped, _ZOBRIST, np.uint64(0))
+    return np.asarray(parent_keys, dtype=np.uint64) ^ np.bitwise_xor.reduce(words, axis=1)
+
+# --- Vectorized heuristic rules, by heuristics.Heuristic name ---
+# A rule is bound to a layout once per search. initial(state) gives the
+# root's auxiliary value (an int kept in the node store next to h), and
+# rule(parent_h, parent_aux, flipped) the children's estimates and
+# auxiliary values. Heuristics without a rule fall back to their own
+# per-child update().
+class _RowsRule:
+    def __init__(self, layout):
+        pass
+
+    def initial(self, state):
+        return 0
+
+    def __call__(self, parent_h, parent_aux, flipped):
+        return parent_h - flipped[:, :engine.PYRAMID_SIZE] @ _SLOT_COST, parent_aux
+
+class _ComplementRule:
+    """
+    Keeps each node's pyramid rank census packed CENSUS_BITS per rank in
+    one int, so a child's census is its parent's minus one matrix-vector
+    product over the flipped pyramid bits.
+    """
+
+    def __init__(self, layout):
+        self.units = [1 << (CENSUS_BITS * r) for r in layout.pyr_ranks]
+        self.unit_vector = np.array(self.units, dtype=np.int64)
+
+    def initial(self, state):
+        return sum(self.units[i] for i in engine.iter_bits(state & engine.PYRAMID_ALL))
+
+    def __call__(self, parent_h, parent_aux, flipped):
+        census = parent_aux - flipped[:, :engine.PYRAMID_SIZE] @ self.unit_vector
+        counts = (census[:, None] >> _CENSUS_SHIFTS) & CENSUS_MASK
+        low, high = counts[:, 1:7], counts[:, 12:6:-1]
+        return (counts[:, 13] + np.maximum(low, high).sum(axis=1)).astype(np.float64), census
+
+VECTOR_RULES = {"rows": _RowsRule, "complement": _ComplementRule}
+
+def solve_astar_batch(layout, start, max_nodes=None, table=None, heuristic=None, reduce=True, stats=None,
+                      progress=None, deadline=None, weight=None, trace=None, memo=None, batch=None):
+    """
+    solvers.solve_astar with batched expansion; same arguments (the
+    endgame `memo` included), results and stats. `batch` nodes
+    (config.ASTAR_BATCH_SIZE by default) leave the open list together, so
+    the expansion order differs slightly from the one-at-a-time search
+    and `weight` should stay above 1 anyway.
+
+    Nodes are always keyed by their Zobrist hash, computed for the whole
+    batch at once; without a `table` the best-g map is keyed by it too.
+    """
+    if not HAS_NUMPY:
+        return solvers.solve_astar(layout, start, max_nodes=max_nodes, table=table, heuristic=heuristic,
+                                   reduce=reduce, stats=stats, progress=progress, deadline=deadline,
+                                   weight=weight, trace=trace, memo=memo)
+    if max_nodes is None: max_nodes = config.ASTAR_MAX_NODES
+    if weight is None: weight = solvers.H_WEIGHT
+    if not reduce: memo = None
+    batch = batch or config.ASTAR_BATCH_SIZE
+
+    # Node store, laid out as in solve_astar
+    n_state = array("Q")
+    n_acc = array("I")
+    n_parent = array("i")
+    n_g = array("H")
+    n_move = array("H")
+    n_h = array("d")
+    n_aux = array("q")
+    n_key = array("Q")
+
+    def codes_to(idx):
+        codes = []
+        while n_parent[idx] >= 0:
+            codes.append(n_move[idx])
+            idx = n_parent[idx]
+        return codes[::-1]
+
+    def path_to(idx):
+        return layout.moves(start, codes_to(idx))
+
+    h_fn = get_heuristic(heuristic).bind(layout)
+    rule = VECTOR_RULES.get(h_fn.name)
+    if rule: rule = rule(layout)
+    expand = solvers.expansion(layout, reduce)
+    keys_of = batch_keys
+    score = rule
+    visit = table.visit if table else None
+    if trace is not None:
+        trace.begin()
+        expand = trace.timed("movegen", expand)
+        keys_of = trace.timed("hashing", keys_of)
+        if rule: score = trace.timed("heuristic", rule)
+        if table: visit = trace.timed("hashing", visit)
+
+    start_h = h_fn.initial(start)
+    start_acc = layout.accessible(start & engine.PYRAMID_ALL)
+    start_key = zobrist_hash(start)
+    best_g = {}
+    if table is None:
+        best_g[start_key] = 0
+    else:
+        table.visit(start_key, 0)
+    n_state.append(start); n_acc.append(start_acc)
+    n_parent.append(-1); n_g.append(0); n_move.append(0); n_h.append(start_h); n_key.append(start_key)
+    n_aux.append(rule.initial(start) if rule else 0)
+    pq = [int(start_h * weight * solvers.F_SCALE + 0.5) << solvers.IDX_BITS]
+
+    nodes_visited = 0
+    clock = time.perf_counter
+    verdict = solvers.UNSOLVABLE
+    best_left = solvers.cards_left(start)
+    best_idx = 0
+    IDX_MASK = solvers.IDX_MASK
+    IDX_BITS = solvers.IDX_BITS
+
+    try:
+        if layout.stranded(start): return None
+        if memo is not None:
+            tail, nodes_visited = solvers.probe_memo(memo, layout, start, start_acc, nodes_visited, max_nodes,
+                                                     deadline)
+            if tail is False: return None
+            if tail == solvers.TIMEOUT:
+                verdict = solvers.TIMEOUT
+                return None
+            if tail is not None:
+                verdict = solvers.SOLVED
+                return layout.moves(start, tail)
+        while pq:
+            # Pop a batch of live nodes
+            popped = []
+            while pq and len(popped) < batch:
+                idx = heapq.heappop(pq) & IDX_MASK
+                state = n_state[idx]
+                g = n_g[idx]
+                if (best_g[n_key[idx]] if table is None else table.lookup(n_key[idx])) < g:
+                    if trace is not None: trace.stale_pop(g, state)
+                    continue
+
+                nodes_visited += 1
+                if not nodes_visited & solvers.CHECK_MASK:
+                    if progress is not None: progress(nodes_visited, len(pq))
+                    if deadline is not None and clock() > deadline:
+                        verdict = solvers.TIMEOUT
+                        return None
+                if nodes_visited > max_nodes:
+                    verdict = solvers.LIMIT
+                    return None
+
+                if not state & engine.PYRAMID_ALL:
+                    verdict = solvers.SOLVED
+                    return path_to(idx)
+
+                left = solvers.cards_left(state)
+                if left < best_left:
+                    best_left, best_idx = left, idx
+                popped.append(idx)
+
+            # Generate every child of the batch
+            c_parent, kids = [], []
+            for idx in popped:
+                state = n_state[idx]
+                parent = n_parent[idx]
+                if parent >= 0:
+                    children = expand(n_move[idx], n_state[parent], n_acc[parent], state, n_acc[idx])
+                else:
+                    children = expand(0, state, 0, state, n_acc[idx])
+                if trace is not None: trace.expand(n_g[idx], len(pq), state, children)
+                c_parent += [idx] * len(children)
+                kids += children
+            if not kids: continue
+
+            # Score them together. The node store is read through zero-copy
+            # views, dropped again before it grows.
+            at = np.array(c_parent)
+            c_state = [kid[1] for kid in kids]
+            parent_states = np.frombuffer(n_state, dtype=np.uint64)[at]
+            flipped = state_bits(parent_states ^ np.array(c_state, dtype=np.uint64))
+            parent_h = np.frombuffer(n_h)[at]
+            c_g = np.frombuffer(n_g, dtype=np.uint16)[at] + 1
+            if rule:
+                c_h, c_aux = score(parent_h, np.frombuffer(n_aux, dtype=np.int64)[at], flipped)
+                c_aux = c_aux.tolist()
+            else:
+                c_h = np.array([h_fn.update(h, p, c)
+                                for h, p, c in zip(parent_h.tolist(), parent_states.tolist(), c_state)])
+                c_aux = [0] * len(kids)
+            c_f = ((c_g + c_h * weight) * solvers.F_SCALE + 0.5).astype(np.int64).tolist()
+            c_key = keys_of(np.frombuffer(n_key, dtype=np.uint64)[at], flipped).tolist()
+            c_h = c_h.tolist()
+            c_g = c_g.tolist()
+
+            # Duplicate detection and pushes stay in order
+            for j, (move, next_state, next_acc) in enumerate(kids):
+                new_g = c_g[j]
+                new_key = c_key[j]
+                if table is None:
+                    known = best_g.get(new_key)
+                    if known is not None and known <= new_g:
+                        if trace is not None: trace.duplicate(new_g, next_state)
+                        continue
+                    best_g[new_key] = new_g
+                elif visit(new_key, new_g):
+                    if trace is not None: trace.duplicate(new_g, next_state)
+                    continue
+
+                if memo is not None:
+                    tail, nodes_visited = solvers.probe_memo(memo, layout, next_state, next_acc, nodes_visited,
+                                                             max_nodes, deadline)
+                    if tail is False: continue
+                    if tail == solvers.TIMEOUT:
+                        verdict = solvers.TIMEOUT
+                        return None
+                    if tail is not None:
+                        verdict = solvers.SOLVED
+                        return layout.moves(start, codes_to(c_parent[j]) + [move] + tail)
+
+                child = len(n_state)
+                n_state.append(next_state); n_acc.append(next_acc); n_parent.append(c_parent[j])
+                n_g.append(new_g); n_move.append(move); n_h.append(c_h[j]); n_key.append(new_key)
+                n_aux.append(c_aux[j])
+                heapq.heappush(pq, (c_f[j] << IDX_BITS) | child)
+        return None
+    finally:
+        if stats is not None:
+            stats["nodes"] = nodes_visited
+            stats["verdict"] = verdict
+            stats["cards_left"] = best_left
+            stats["partial"] = path_to(best_idx)
+        if memo is not None: memo.flush()
+        if trace is not None:
+            trace.end()
+            if stats is not None: stats["trace"] = trace.as_dict()
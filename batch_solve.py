@@ -0,0 +1,127 @@
+# batch_solve.py
+# Headless batch solver: reads deals, yields one result record per deal.
+#
+#   python batch_solve.py deals.txt -o results.jsonl --algo astar
+#   seq 0 999 | python batch_solve.py --algo dfs > results.jsonl
+#   python batch_solve.py hard_deals.txt --algo parallel --max-nodes 5000000
+#
+#   python batch_solve.py deals.txt --time-budget 0.5
+#
+# Input is one deal per line, either JSON ({"seed": 7}, {"deck": [...52
+# card numbers...]}, optional "id") or plain text: a single seed, or 52
+# card numbers (1-52) separated by spaces or commas. Blank lines and
+# lines starting with "#" are skipped. Output is JSON Lines, written and
+# flushed one record at a time, so memory stays flat for any batch size.
+import argparse
+import json
+import sys
+
+import models
+import engine
+import solvers
+import parallel
+import game_logic as gl
+
+# "parallel" splits each deal's search over every core
+SOLVERS = {"dfs": solvers.solve_dfs, "astar": solvers.solve_astar, "idastar": solvers.solve_idastar,
+           "parallel": parallel.solve_parallel}
+
+# --- Parsing ---
+def parse_deal(line):
+    """
+    Returns (fields, deck) for one input line, where fields carries the
+    identifying keys (id / seed) and deck is a list of 52 Card objects.
+    Raises ValueError on malformed input.
+    """
+    line = line.strip()
+    if line.startswith("{"):
+        obj = json.loads(line)
+        fields = {k: obj[k] for k in ("id", "seed") if k in obj}
+        if "deck" in obj:
+            return fields, deck_from_numbers(obj["deck"])
+        if "seed" in obj:
+            return fields, models.create_deck(int(obj["seed"]))
+        raise ValueError("deal needs a 'seed' or a 'deck'")
+
+    tokens = line.replace(",", " ").split()
+    if len(tokens) == 1:
+        return {"seed": int(tokens[0])}, models.create_deck(int(tokens[0]))
+    return {}, deck_from_numbers(tokens)
+
+def deck_from_numbers(numbers):
+    numbers = [int(n) for n in numbers]
+    if sorted(numbers) != list(range(1, 53)):
+        raise ValueError("deck must list each card number 1-52 exactly once")
+    return [models.Card(n) for n in numbers]
+
+def iter_deals(lines):
+    """Lazily yields (fields, deck or None, error or None) for each non-blank line."""
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip() or line.lstrip().startswith("#"): continue
+        try:
+            fields, deck = parse_deal(line)
+        except (ValueError, TypeError, KeyError) as e:
+            yield {"id": line_no}, None, str(e)
+            continue
+        yield dict(id=fields.pop("id", line_no), **fields), deck, None
+
+# --- Solving ---
+def solve_deck(deck, algorithm="astar", max_nodes=None, time_budget=None):
+    """
+    Solves one 52-card deal and returns the result fields. Unsolved deals
+    also carry the partial line that got furthest and its cards left.
+    """
+    layout, start = engine.Layout.from_lists(deck[:28], deck[28:], ["**"])
+    res = solvers.search(SOLVERS[algorithm], layout, start, time_budget, max_nodes=max_nodes)
+    sol = res["moves"]
+    record = {
+        "solved": sol is not None,
+        "status": res["status"],
+        "moves": [gl.get_move_string(m) for m in sol] if sol is not None else [],
+        "nodes": res["nodes"],
+        "time": round(res["elapsed"], 6),
+    }
+    if sol is None:
+        record["partial"] = [gl.get_move_string(m) for m in res["partial"]]
+        record["cards_left"] = res["cards_left"]
+    return record
+
+def solve_stream(lines, algorithm="astar", max_nodes=None, time_budget=None):
+    """
+    Generator API: one result record per deal in `lines` (any iterable of
+    strings, e.g. an open file), produced lazily in input order.
+    `time_budget` caps each deal's search in seconds.
+    """
+    if algorithm not in SOLVERS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    for fields, deck, error in iter_deals(lines):
+        record = dict(fields, algorithm=algorithm)
+        if error:
+            record["error"] = error
+        else:
+            record.update(solve_deck(deck, algorithm, max_nodes, time_budget))
+        yield record
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve Pyramid Solitaire deals in batch (JSON Lines output).")
+    parser.add_argument("input", nargs="?", default="-", help="deal file, or - for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="result file, or - for stdout (default)")
+    parser.add_argument("--algo", choices=sorted(SOLVERS), default="astar")
+    parser.add_argument("--max-nodes", type=int, default=None, help="node limit per deal")
+    parser.add_argument("--time-budget", type=float, default=None, help="seconds per deal")
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, "r")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for record in solve_stream(src, args.algo, args.max_nodes, args.time_budget):
+            dst.write(json.dumps(record) + "\n")
+            dst.flush()
+    finally:
+        if src is not sys.stdin: src.close()
+        if dst is not sys.stdout: dst.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+# bench_suite.py
+# Reproducible solver benchmark over fixed deal corpora, with a compare
+# mode for approving solver changes.
+#
+#   python bench_suite.py run -o results.json
+#   python bench_suite.py run --tiers easy,hard --algo DFS,A*,Portfolio --repeat 5 -o new.json
+#   python bench_suite.py compare baseline.json new.json
+#   python bench_suite.py tiers
+#
+# Every deal is a fixed seed for models.create_deck, grouped into tiers by
+# how hard the default solvers find it. `tiers` re-derives the groups from
+# the current solvers; rerun it (and bump SUITE_VERSION) whenever a solver
+# change moves deals between tiers. Each solve is timed `repeat` times
+# with time.perf_counter and the median kept; a separate pass under
+# tracemalloc records its peak memory. Results are written as JSON, one
+# sample per seed, so two runs can be compared deal by deal.
+#
+# compare pairs the samples by seed and flags a regression when the new
+# run is slower by more than the threshold and a one-sided Wilcoxon
+# signed-rank test says the slowdown is significant, when it solves fewer
+# deals, or when a deterministic solver expands more nodes or uses more
+# memory than the threshold allows. The exit status is 1 on a regression.
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import config
+import solvers
+import portfolio
+import parallel
+from benchmark import deal
+
+SUITE_VERSION = 2
+
+# Tier rules (see derive_tiers): a deal's difficulty is the larger node
+# count of DFS and A* with their default limits and no endgame memo, as
+# run_deal runs them. Easy needs fewer than EASY_MAX_NODES, hard at least
+# HARD_MIN_NODES or is not settled within the limit, medium is between.
+# Each tier takes the first TIER_SIZE seeds of 0..TIER_SEEDS-1 that fit.
+EASY_MAX_NODES = 100
+HARD_MIN_NODES = 20000
+TIER_SIZE = 20
+TIER_SEEDS = 400
+
+# Output of `bench_suite.py tiers` for the cursor-free canonical search
+# with stranded-card pruning
+TIERS = {
+    "easy": [0, 1, 2, 3, 6, 7, 8, 9, 10, 11, 12, 13, 15, 16, 17, 18, 20, 21, 23, 24],
+    "medium": [5, 19, 22, 29, 31, 33, 34, 37, 38, 43, 50, 55, 65, 66, 67, 71, 73, 77, 78, 82],
+    "hard": [4, 14, 44, 47, 60, 64, 72, 74, 86, 88, 92, 121, 137, 140, 173, 186, 205, 220, 223, 228],
+}
+
+SOLVERS = {
+    "DFS": solvers.solve_dfs,
+    "A*": solvers.solve_astar,
+    "IDA*": solvers.solve_idastar,
+    portfolio.NAME: portfolio.solve_portfolio,
+    parallel.NAME: parallel.solve_parallel,
+}
+DEFAULT_ALGOS = ["DFS", "A*"]
+# Same deal, same nodes every run; the others race processes. Memory is
+# only traced for these too, since tracemalloc cannot see child processes.
+DETERMINISTIC = ("DFS", "A*", "IDA*")
+
+DEFAULT_REPEAT = 3
+DEFAULT_ALPHA = 0.05
+DEFAULT_THRESHOLD = 0.05
+
+# --- Statistics ---
+def percentile(values, q):
+    """q-th percentile (0-100) with linear interpolation between ranks."""
+    if not values: return 0.0
+    xs = sorted(values)
+    pos = (len(xs) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(xs) - 1)
+    return xs[lo] + (xs[hi] - xs[lo]) * (pos - lo)
+
+def wilcoxon_greater(before, after):
+    """
+    One-sided Wilcoxon signed-rank test that `after` tends to be larger
+    than `before` (paired samples), normal approximation. Returns the
+    p-value, or None with fewer than 6 non-zero differences.
+    """
+    diffs = [b - a for a, b in zip(before, after) if b != a]
+    n = len(diffs)
+    if n < 6: return None
+
+    # Rank |d| with ties sharing their average rank
+    order = sorted(range(n), key=lambda i: abs(diffs[i]))
+    ranks = [0.0] * n
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and abs(diffs[order[j + 1]]) == abs(diffs[order[i]]):
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2.0 + 1
+        i = j + 1
+
+    w_plus = sum(r for r, d in zip(ranks, diffs) if d > 0)
+    mean = n * (n + 1) / 4.0
+    sd = math.sqrt(n * (n + 1) * (2 * n + 1) / 24.0)
+    z = (w_plus - mean) / sd
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+# --- Tiers ---
+def difficulty(seed):
+    """Larger node count of DFS and A* on the deal, or None when either fails to settle it."""
+    layout, start = deal(seed)
+    worst = 0
+    for solve in (solvers.solve_dfs, solvers.solve_astar):
+        stats = {}
+        solve(layout, start, stats=stats)
+        if stats["verdict"] not in (solvers.SOLVED, solvers.UNSOLVABLE): return None
+        worst = max(worst, stats["nodes"])
+    return worst
+
+def derive_tiers(seeds=None, size=TIER_SIZE, log=None):
+    """TIERS as the tier rules pick them from `seeds` (0..TIER_SEEDS-1 by default)."""
+    tiers = {"easy": [], "medium": [], "hard": []}
+    for seed in seeds if seeds is not None else range(TIER_SEEDS):
+        nodes = difficulty(seed)
+        if nodes is None or nodes >= HARD_MIN_NODES:
+            tier = "hard"
+        else:
+            tier = "easy" if nodes < EASY_MAX_NODES else "medium"
+        if log: log(f"seed {seed:<5} {'-' if nodes is None else nodes:>8} {tier}\n")
+        if len(tiers[tier]) < size: tiers[tier].append(seed)
+        if all(len(t) >= size for t in tiers.values()): break
+    return tiers
+
+# --- Running ---
+def run_deal(solve, seed, max_nodes=None, repeat=DEFAULT_REPEAT, trace_memory=True):
+    """One sample: median time over `repeat` solves, plus nodes, verdict, steps and peak memory."""
+    layout, start = deal(seed)
+    times = []
+    for _ in range(repeat):
+        stats = {}
+        t0 = time.perf_counter()
+        moves = solve(layout, start, max_nodes=max_nodes, stats=stats)
+        times.append(time.perf_counter() - t0)
+
+    sample = {
+        "seed": seed,
+        "time": statistics.median(times),
+        "nodes": stats["nodes"],
+        "verdict": stats["verdict"],
+        "steps": len(moves) if moves else 0,
+        "peak_bytes": None,
+    }
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            solve(layout, start, max_nodes=max_nodes, stats={})
+            sample["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return sample
+
+def summarize(samples):
+    times = [s["time"] for s in samples]
+    total_time = sum(times)
+    total_nodes = sum(s["nodes"] for s in samples)
+    peaks = [s["peak_bytes"] for s in samples if s["peak_bytes"] is not None]
+    return {
+        "deals": len(samples),
+        "solved": sum(1 for s in samples if s["verdict"] == solvers.SOLVED),
+        "unsolvable": sum(1 for s in samples if s["verdict"] == solvers.UNSOLVABLE),
+        "limit": sum(1 for s in samples if s["verdict"] not in (solvers.SOLVED, solvers.UNSOLVABLE)),
+        "total_time": total_time,
+        "total_nodes": total_nodes,
+        "nodes_per_sec": total_nodes / total_time if total_time else 0.0,
+        "mean": total_time / len(samples) if samples else 0.0,
+        "p50": percentile(times, 50),
+        "p95": percentile(times, 95),
+        "p99": percentile(times, 99),
+        "peak_bytes_p50": percentile(peaks, 50) if peaks else None,
+        "peak_bytes_max": max(peaks) if peaks else None,
+    }
+
+def machine_info():
+    info = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+    if resource is not None:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        info["max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    return info
+
+def run_suite(algos=None, tiers=None, max_nodes=None, repeat=DEFAULT_REPEAT, trace_memory=True, log=None):
+    """Runs every (algorithm, tier) pair and returns the JSON-ready result document."""
+    algos = algos or DEFAULT_ALGOS
+    tiers = tiers or list(TIERS)
+    started = time.time()
+    results = {}
+    for algo in algos:
+        solve = SOLVERS[algo]
+        results[algo] = {}
+        for tier in tiers:
+            samples = []
+            for seed in TIERS[tier]:
+                samples.append(run_deal(solve, seed, max_nodes, repeat,
+                                        trace_memory and algo in DETERMINISTIC))
+                if log: log(f"{algo:<10} {tier:<7} seed {seed:<5} {samples[-1]['verdict']:<10} "
+                            f"{samples[-1]['time']:.4f} s\n")
+            results[algo][tier] = {"summary": summarize(samples), "samples": samples}
+
+    return {
+        "suite_version": SUITE_VERSION,
+        "started": started,
+        "duration": time.time() - started,
+        "settings": {
+            "repeat": repeat,
+            "max_nodes": max_nodes,
+            "default_limits": {"DFS": config.DFS_MAX_NODES, "A*": config.ASTAR_MAX_NODES,
+                               "IDA*": config.IDASTAR_MAX_NODES,
+                               portfolio.NAME: config.PORTFOLIO_MAX_NODES, parallel.NAME: config.DFS_MAX_NODES},
+            "tiers": {tier: TIERS[tier] for tier in tiers},
+        },
+        "machine": machine_info(),
+        "results": results,
+    }
+
+def format_summary(doc):
+    lines = [f"{'ALGORITHM':<10} | {'TIER':<7} | {'SOLVED':>7} | {'NODES/S':>9} | "
+             f"{'P50 (s)':>8} | {'P95 (s)':>8} | {'P99 (s)':>8} | {'PEAK MB':>8}\n",
+             f"{'-'*88}\n"]
+    for algo, tiers in doc["results"].items():
+        for tier, res in tiers.items():
+            s = res["summary"]
+            peak = f"{s['peak_bytes_max'] / 2**20:.1f}" if s["peak_bytes_max"] is not None else "-"
+            lines.append(f"{algo:<10} | {tier:<7} | {s['solved']:>3}/{s['deals']:<3} | {s['nodes_per_sec']:>9.0f} | "
+                         f"{s['p50']:>8.4f} | {s['p95']:>8.4f} | {s['p99']:>8.4f} | {peak:>8}\n")
+    return "".join(lines)
+
+# --- Comparing ---
+def compare(base, new, alpha=DEFAULT_ALPHA, threshold=DEFAULT_THRESHOLD):
+    """
+    Returns (lines, regressions): a report line per (algorithm, tier) found
+    in both documents, and the list of regression descriptions.
+    """
+    lines = []
+    regressions = []
+    if base["machine"].get("platform") != new["machine"].get("platform") or \
+            base["machine"].get("python") != new["machine"].get("python"):
+        lines.append("WARNING: runs come from different machines or Python versions\n")
+    if base.get("suite_version") != new.get("suite_version"):
+        lines.append("WARNING: runs come from different suite versions; tiers may hold different deals\n")
+
+    for algo, tiers in new["results"].items():
+        for tier, res in tiers.items():
+            old = base["results"].get(algo, {}).get(tier)
+            if old is None: continue
+            before = {s["seed"]: s for s in old["samples"]}
+            pairs = [(before[s["seed"]], s) for s in res["samples"] if s["seed"] in before]
+            if not pairs: continue
+
+            t_old = [a["time"] for a, _ in pairs]
+            t_new = [b["time"] for _, b in pairs]
+            p50_old, p50_new = percentile(t_old, 50), percentile(t_new, 50)
+            ratio = p50_new / p50_old if p50_old else 1.0
+            p_slower = wilcoxon_greater(t_old, t_new)
+            p_faster = wilcoxon_greater(t_new, t_old)
+
+            label = f"{algo} / {tier}"
+            flags = []
+            if ratio > 1 + threshold and p_slower is not None and p_slower < alpha:
+                flags.append(f"slower: p50 x{ratio:.2f} (p={p_slower:.4f})")
+            lost = [a["seed"] for a, b in pairs if a["verdict"] == solvers.SOLVED and b["verdict"] != solvers.SOLVED]
+            if lost:
+                flags.append(f"no longer solves seeds {lost}")
+            if algo in DETERMINISTIC:
+                n_old = sum(a["nodes"] for a, _ in pairs)
+                n_new = sum(b["nodes"] for _, b in pairs)
+                if n_old and n_new > n_old * (1 + threshold):
+                    flags.append(f"nodes x{n_new / n_old:.2f}")
+                m_old = [a["peak_bytes"] for a, _ in pairs if a["peak_bytes"] is not None]
+                m_new = [b["peak_bytes"] for _, b in pairs if b["peak_bytes"] is not None]
+                if m_old and m_new and max(m_new) > max(m_old) * (1 + threshold):
+                    flags.append(f"peak memory x{max(m_new) / max(m_old):.2f}")
+
+            status = "REGRESSION" if flags else "ok"
+            if not flags and ratio < 1 - threshold and p_faster is not None and p_faster < alpha:
+                status = "faster"
+            p_text = "n/a" if p_slower is None else f"{p_slower:.4f}"
+            lines.append(f"{label:<20} | p50 {p50_old:.4f} -> {p50_new:.4f} s (x{ratio:.2f}, p={p_text}) | {status}\n")
+            for flag in flags:
+                lines.append(f"    - {flag}\n")
+                regressions.append(f"{label}: {flag}")
+    return lines, regressions
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproducible solver benchmark suite.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run the suite and write a JSON result file")
+    run.add_argument("-o", "--output", default="-", help="result file, or - for stdout (default)")
+    run.add_argument("--algo", default=",".join(DEFAULT_ALGOS),
+                     help=f"comma-separated, from {', '.join(SOLVERS)}")
+    run.add_argument("--tiers", default=",".join(TIERS), help=f"comma-separated, from {', '.join(TIERS)}")
+    run.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed solves per deal (median kept)")
+    run.add_argument("--max-nodes", type=int, default=None, help="node limit (default: each solver's own)")
+    run.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+
+    cmp = sub.add_parser("compare", help="diff two result files and flag regressions")
+    cmp.add_argument("baseline")
+    cmp.add_argument("candidate")
+    cmp.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="significance level")
+    cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                     help="relative change that counts as a regression")
+    sub.add_parser("tiers", help="re-derive TIERS from the current solvers and print them as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "tiers":
+        print(json.dumps(derive_tiers(log=sys.stderr.write)))
+        return 0
+
+    if args.command == "compare":
+        with open(args.baseline) as f: base = json.load(f)
+        with open(args.candidate) as f: new = json.load(f)
+        lines, regressions = compare(base, new, args.alpha, args.threshold)
+        sys.stdout.write("".join(lines))
+        print(f"\n{len(regressions)} regression(s)")
+        return 1 if regressions else 0
+
+    algos = [a.strip() for a in args.algo.split(",") if a.strip()]
+    tiers = [t.strip() for t in args.tiers.split(",") if t.strip()]
+    for name in algos:
+        if name not in SOLVERS: parser.error(f"unknown algorithm: {name}")
+    for name in tiers:
+        if name not in TIERS: parser.error(f"unknown tier: {name}")
+
+    doc = run_suite(algos, tiers, args.max_nodes, args.repeat, not args.no_memory, log=sys.stderr.write)
+    text = json.dumps(doc, indent=1)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as f: f.write(text + "\n")
+    sys.stderr.write(format_summary(doc))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,92 +1,256 @@
 # benchmark.py
+import os
 import time
-import random
+import queue
+import threading
+import multiprocessing
+from functools import partial
+
 import models
 import solvers
-import game_logic as gl
-import settings
-import threading
+import engine
+import endgame
+from transposition import TranspositionTable
+import config
+import solution_cache
+import portfolio
+from instrument import SearchTrace, TIMERS
 
-def run_benchmark_gui(num_runs, node_limit, log_callback, on_finish):
-    # Run benchmark in a separate thread to avoid blocking the UI
-    def task():
-        log_callback(f"{'='*60}\n")
-        log_callback(f"BENCHMARK STARTED\n")
-        log_callback(f"Games: {num_runs} | Node Limit: {node_limit}\n")
-        log_callback(f"{'='*60}\n")
+ALGORITHMS = ["DFS", "A*", "IDA*"]
+PORTFOLIO = portfolio.NAME
+
+# Report column titles, where they differ from the algorithm name
+COLUMN_TITLES = {"A*": "A* (Heuristic)"}
+
+# --- Worker side (runs in the pool processes) ---
+_table = None
+_cache = None
+
+def deal(seed):
+    """Same deal the GUI would get after random.seed(seed)."""
+    deck = models.create_deck(seed)
+    return engine.Layout.from_lists(deck[:28], deck[28:], ["**"])
+
+def benchmark_game(seed, node_limit, use_cache=True, racers=0, instrument=False):
+    """
+    Solves one seed with every algorithm and returns a plain dict record
+    (picklable, so it can stream back from a worker process). With
+    `use_cache` results already in the solution cache are not re-searched.
+    `racers` > 0 also races a portfolio of that many worker processes,
+    which must not happen inside a (daemonic) pool worker. `instrument`
+    attaches a SearchTrace summary to each DFS / A* / IDA* entry; it bypasses
+    the cache, since a cached result has no search to trace. The solvers share
+    the process's endgame memo, so endgames met in earlier seeds are
+    lookups; it is in memory only unless config.BENCHMARK_MEMO_ON_DISK is set.
+    """
+    global _table, _cache
+    # One bounded table and one cache connection per process
+    if _table is None:
+        _table = TranspositionTable(config.TT_BUDGET_BYTES, config.TT_POLICY)
+    if use_cache and _cache is None:
+        _cache = solution_cache.open_cache()
+    cache = _cache if use_cache and not instrument else None
+
+    memo = endgame.shared(config.ENDGAME_MEMO_PATH if config.BENCHMARK_MEMO_ON_DISK else None)
 
-        results = {
-            "DFS": {"wins": 0, "total_time": 0, "total_steps": 0, "timeouts": 0},
-            "A*":  {"wins": 0, "total_time": 0, "total_steps": 0, "timeouts": 0}
-        }
+    # Deal once; every solver searches the same packed start state
+    layout, start = deal(seed)
+    record = {"seed": seed}
+    for algo in ALGORITHMS:
+        solve = solvers.ALGORITHMS[algo]
+        _table.clear()
+        trace = SearchTrace() if instrument else None
+        t0 = time.perf_counter()
+        sol, nodes, verdict, cached = solution_cache.solve_cached(
+            cache, algo, solve, layout, start, node_limit, table=_table, trace=trace, memo=memo)
+        t1 = time.perf_counter()
+        record[algo] = {"solved": bool(sol), "steps": len(sol) if sol else 0, "time": t1 - t0,
+                        "nodes": nodes, "verdict": verdict, "cached": cached}
+        if trace is not None: record[algo]["trace"] = trace.as_dict()
 
+    if racers:
+        solve = partial(portfolio.solve_portfolio, configs=portfolio.default_configs(racers))
+        t0 = time.perf_counter()
+        sol, nodes, verdict, cached = solution_cache.solve_cached(cache, PORTFOLIO, solve, layout, start, node_limit)
+        t1 = time.perf_counter()
+        record[PORTFOLIO] = {"solved": bool(sol), "steps": len(sol) if sol else 0, "time": t1 - t0,
+                             "nodes": nodes, "verdict": verdict, "cached": cached}
+    return record
+
+# --- Process pool runner ---
+def iter_benchmark(num_runs, node_limit, workers=None, use_cache=True, use_portfolio=False, instrument=False):
+    """
+    Spreads seeds 0..num_runs-1 over a process pool and yields each game's
+    record as soon as it finishes (completion order, not seed order).
+
+    With `use_portfolio` the portfolio races `workers` processes per game,
+    so games run one at a time in this process instead; every algorithm
+    then has the whole machine and the solve times are comparable.
+    """
+    workers = workers or os.cpu_count() or 1
+    if use_portfolio:
         for seed in range(num_runs):
-            log_callback(f"Game {seed+1}/{num_runs}...")
-            
-            # --- Run DFS ---
-            random.seed(seed)
-            deck = models.create_deck()
-            p, s, w, f = deck[:28], deck[28:], ["**"], []
-            
-            t0 = time.time()
-            sol_dfs = solvers.find_solution_dfs(p, s, w, f) 
-            t1 = time.time()
-            
-            if sol_dfs:
-                results["DFS"]["wins"] += 1
-                results["DFS"]["total_steps"] += len(sol_dfs)
-                results["DFS"]["total_time"] += (t1 - t0)
-            else:
-                results["DFS"]["timeouts"] += 1
-                results["DFS"]["total_time"] += (t1 - t0)
-
-            # --- Run A* ---
-            random.seed(seed)
-            deck = models.create_deck()
-            p, s, w, f = deck[:28], deck[28:], ["**"], []
-
-            t0 = time.time()
-            sol_astar = solvers.find_solution_astar(p, s, w, f)
-            t1 = time.time()
-
-            if sol_astar:
-                results["A*"]["wins"] += 1
-                results["A*"]["total_steps"] += len(sol_astar)
-                results["A*"]["total_time"] += (t1 - t0)
+            yield benchmark_game(seed, node_limit, use_cache, racers=workers, instrument=instrument)
+        return
+
+    job = partial(benchmark_game, node_limit=node_limit, use_cache=use_cache, instrument=instrument)
+    if workers == 1 or num_runs == 1:
+        for seed in range(num_runs):
+            yield job(seed)
+        return
+
+    with multiprocessing.Pool(processes=min(workers, num_runs)) as pool:
+        for record in pool.imap_unordered(job, range(num_runs)):
+            yield record
+
+def algorithms_in(records):
+    """ALGORITHMS, plus the portfolio when the records include it."""
+    if any(PORTFOLIO in rec for rec in records): return ALGORITHMS + [PORTFOLIO]
+    return list(ALGORITHMS)
+
+def summarize(records, num_runs):
+    algos = algorithms_in(records)
+    results = {algo: {"wins": 0, "total_time": 0, "total_steps": 0, "timeouts": 0} for algo in algos}
+    for rec in records:
+        for algo in algos:
+            r = rec[algo]
+            results[algo]["total_time"] += r["time"]
+            if r["solved"]:
+                results[algo]["wins"] += 1
+                results[algo]["total_steps"] += r["steps"]
             else:
-                results["A*"]["timeouts"] += 1
-                results["A*"]["total_time"] += (t1 - t0)
-            
-            # Print brief status for this run
-            dfs_status = "Win" if sol_dfs else "Fail"
-            astar_status = "Win" if sol_astar else "Fail"
-            log_callback(f" [DFS: {dfs_status}, A*: {astar_status}]\n")
-
-        # --- Final Report ---
-        log_callback(f"\n{'='*60}\n")
-        log_callback(f"{'METRIC':<15} | {'DFS':<15} | {'A* (Heuristic)':<15}\n")
-        log_callback(f"{'-'*60}\n")
-
-        for algo in ["DFS", "A*"]:
-            wins = results[algo]["wins"]
-            avg_time = results[algo]["total_time"] / num_runs
-            avg_steps = results[algo]["total_steps"] / wins if wins > 0 else 0
-            
-            results[algo]["avg_time"] = avg_time
-            results[algo]["avg_steps"] = avg_steps
-
-        # Formatting Strings
-        row_wins = f"{results['DFS']['wins']}/{num_runs} ({results['DFS']['wins']/num_runs*100:.1f}%)"
-        row_wins_a = f"{results['A*']['wins']}/{num_runs} ({results['A*']['wins']/num_runs*100:.1f}%)"
-        
-        log_callback(f"{'Win Rate':<15} | {row_wins:<15} | {row_wins_a:<15}\n")
-        log_callback(f"{'Avg Time':<15} | {results['DFS']['avg_time']:.4f} s        | {results['A*']['avg_time']:.4f} s\n")
-        log_callback(f"{'Avg Steps':<15} | {results['DFS']['avg_steps']:.1f}           | {results['A*']['avg_steps']:.1f}\n")
-        log_callback(f"{'='*60}\n")
+                results[algo]["timeouts"] += 1
+
+    for algo in algos:
+        wins = results[algo]["wins"]
+        results[algo]["avg_time"] = results[algo]["total_time"] / num_runs if num_runs else 0
+        results[algo]["avg_steps"] = results[algo]["total_steps"] / wins if wins > 0 else 0
+        traces = [rec[algo]["trace"] for rec in records if "trace" in rec[algo]]
+        if traces: results[algo]["trace"] = merge_traces(traces)
+    return results
+
+def merge_traces(traces):
+    """Totals (and maxima) over several SearchTrace summaries."""
+    total = {k: sum(t[k] for t in traces) for k in ("expanded", "generated", "duplicates", "stale")}
+    total["max_depth"] = max(t["max_depth"] for t in traces)
+    total["max_frontier"] = max(t["max_frontier"] for t in traces)
+    total["branching"] = total["generated"] / total["expanded"] if total["expanded"] else 0.0
+    total["time"] = {k: sum(t["time"][k] for t in traces) for k in TIMERS + ("total", "other")}
+    return total
+
+def format_header(num_runs, node_limit, workers):
+    return (f"{'='*60}\n"
+            f"BENCHMARK STARTED\n"
+            f"Games: {num_runs} | Node Limit: {node_limit} | Workers: {workers}\n"
+            f"{'='*60}\n")
+
+def format_game(record, done, num_runs):
+    def status(r):
+        return ("Win" if r["solved"] else "Fail") + (" (cached)" if r.get("cached") else "")
+    parts = [f"{algo}: {status(record[algo])}" for algo in algorithms_in([record])]
+    return f"[{done}/{num_runs}] Seed {record['seed']}: [{', '.join(parts)}]\n"
+
+def format_report(results, num_runs):
+    algos = list(results)
+    width = 18 * (len(algos) + 1) + 6
+
+    def row(name, cells):
+        return f"{name:<15} | " + " | ".join(f"{c:<15}" for c in cells) + "\n"
+
+    lines = [f"\n{'='*width}\n",
+             row("METRIC", [COLUMN_TITLES.get(a, a) for a in algos]),
+             f"{'-'*width}\n"]
+    lines.append(row("Win Rate", [f"{results[a]['wins']}/{num_runs} ({results[a]['wins']/num_runs*100:.1f}%)"
+                                  for a in algos]))
+    lines.append(row("Avg Time", [f"{results[a]['avg_time']:.4f} s" for a in algos]))
+    lines.append(row("Avg Steps", [f"{results[a]['avg_steps']:.1f}" for a in algos]))
+
+    # Search instrumentation (instrumented runs only)
+    traced = [a for a in algos if "trace" in results[a]]
+    if traced:
+        def cell(a, fmt):
+            return fmt(results[a]["trace"]) if a in traced else "-"
+
+        def share(key):
+            return lambda t: f"{t['time'][key] / t['time']['total'] * 100:.0f}%" if t["time"]["total"] else "-"
+
+        lines.append(f"{'-'*width}\n")
+        lines.append(row("Expanded", [cell(a, lambda t: f"{t['expanded']:,}") for a in algos]))
+        lines.append(row("Generated", [cell(a, lambda t: f"{t['generated']:,}") for a in algos]))
+        lines.append(row("Dup Hits", [cell(a, lambda t: f"{t['duplicates']:,}") for a in algos]))
+        lines.append(row("Max Depth", [cell(a, lambda t: str(t["max_depth"])) for a in algos]))
+        lines.append(row("Max Frontier", [cell(a, lambda t: f"{t['max_frontier']:,}") for a in algos]))
+        lines.append(row("Branching", [cell(a, lambda t: f"{t['branching']:.2f}") for a in algos]))
+        for key in TIMERS + ("other",):
+            lines.append(row(f"Time {key}", [cell(a, share(key)) for a in algos]))
+    lines.append(f"{'='*width}\n")
+    return "".join(lines)
+
+# --- GUI bridge ---
+class BenchmarkStream:
+    """
+    Runs iter_benchmark on a background thread and buffers the records, so
+    a Tk window can drain them from its own after() loop.
+    """
+
+    def __init__(self, num_runs, node_limit, workers=None, use_cache=True, use_portfolio=False,
+                 instrument=False):
+        self.num_runs = num_runs
+        self.node_limit = node_limit
+        self.use_cache = use_cache
+        self.use_portfolio = use_portfolio
+        self.instrument = instrument
+        self.workers = workers or os.cpu_count() or 1
+        self.records = []
+        self.error = None
+        self.finished = False
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for record in iter_benchmark(self.num_runs, self.node_limit, self.workers, self.use_cache,
+                                         self.use_portfolio, self.instrument):
+                self._queue.put(record)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+
+    def drain(self):
+        """Records that arrived since the last call (never blocks)."""
+        out = []
+        while True:
+            try:
+                out.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self.records.extend(out)
+        return out
+
+    def done(self):
+        return self.finished and self._queue.empty()
+
+def run_benchmark_gui(num_runs, node_limit, log_callback, on_finish, workers=None, use_cache=True,
+                      use_portfolio=False, instrument=False):
+    # Run benchmark in a separate thread to avoid blocking the UI
+    def task():
+        n_workers = workers or os.cpu_count() or 1
+        log_callback(format_header(num_runs, node_limit, n_workers))
+        records = []
+        for record in iter_benchmark(num_runs, node_limit, n_workers, use_cache, use_portfolio, instrument):
+            records.append(record)
+            log_callback(format_game(record, len(records), num_runs))
+
+        log_callback(format_report(summarize(records, num_runs), num_runs))
         log_callback("DONE.")
-        
+
         if on_finish:
             on_finish()
 
     # Start the thread
-    threading.Thread(target=task, daemon=True).start()
\ No newline at end of file
+    threading.Thread(target=task, daemon=True).start()
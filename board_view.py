@@ -0,0 +1,190 @@
+# board_view.py
+# Retained-mode drawing of the board on the main window's canvas.
+#
+# Every slot (28 pyramid slots, stock, waste) owns a fixed set of canvas
+# items, created once: a selection highlight, the card image, a drawn card
+# face for when there are no images, and an empty-slot outline. A redraw
+# compares what each slot shows now with what it showed last time and
+# only reconfigures the slots that changed, instead of deleting and
+# recreating everything.
+#
+# Slot positions depend only on the canvas width, so BoardLayout computes
+# them (and a grid for click hit-testing) once per width.
+import card_atlas
+import models
+import settings
+
+PYRAMID_SLOTS = 28
+STOCK = "stock"
+WASTE = "waste"
+
+HIGHLIGHT = "yellow"
+EMPTY_OUTLINE = "#3a6f50"
+
+class BoardLayout:
+    """
+    Slot rectangles for one canvas width. Targets are pyramid slot
+    indexes (0-27), STOCK and WASTE. hit() finds the target under a point
+    through a grid of cells, each listing the few slots that overlap it.
+    """
+
+    def __init__(self, width):
+        self.width = width
+        w, h = settings.CARD_W, settings.CARD_H
+        self.origins = {}
+
+        y = settings.TOP_OFFSET
+        idx = 0
+        for row in range(1, 8):
+            row_width = row * w + (row - 1) * settings.PADDING_X
+            start_x = (width - row_width) // 2
+            if start_x < 0: start_x = (settings.SCREEN_W - 240 - row_width) // 2
+            for col in range(row):
+                self.origins[idx] = (start_x + col * (w + settings.PADDING_X), y)
+                idx += 1
+            y += h + settings.PADDING_Y
+
+        self.origins[STOCK] = (settings.SIDE_OFFSET, settings.TOP_OFFSET)
+        self.origins[WASTE] = (settings.SIDE_OFFSET + w + 30, settings.TOP_OFFSET)
+
+        # Half a column step wide, one row step high: rows are offset by half a step
+        self.cell_w = max((w + settings.PADDING_X) // 2, 1)
+        self.cell_h = max(h + settings.PADDING_Y, 1)
+        self.grid = {}
+        for target, (x, y) in self.origins.items():
+            for cx in range(x // self.cell_w, (x + w) // self.cell_w + 1):
+                for cy in range(y // self.cell_h, (y + h) // self.cell_h + 1):
+                    self.grid.setdefault((cx, cy), []).append(target)
+
+    def hit(self, mx, my):
+        """Target whose card rectangle (edges included) contains the point, or None."""
+        for target in self.grid.get((mx // self.cell_w, my // self.cell_h), ()):
+            x, y = self.origins[target]
+            if x <= mx <= x + settings.CARD_W and y <= my <= y + settings.CARD_H:
+                return target
+        return None
+
+class BoardView:
+    """
+    Persistent canvas items for the board. render() takes the game lists
+    and the current selection; relayout() moves the items when the canvas
+    width changes.
+    """
+
+    def __init__(self, canvas, atlas=None):
+        self.canvas = canvas
+        self.atlas = atlas
+        self.layout = BoardLayout(self._canvas_width())
+        self.items = {}
+        self.shown = {}
+        for target in self.layout.origins:
+            self.items[target] = self._create_slot(target)
+            self.shown[target] = None
+
+    def _canvas_width(self):
+        return self.canvas.winfo_width()
+
+    # --- Items ---
+    def _create_slot(self, target):
+        c = self.canvas
+        tag = f"pyramid_{target}" if isinstance(target, int) else target
+        hidden = {"state": "hidden", "tags": (tag,)}
+        items = {
+            "select": c.create_rectangle(0, 0, 0, 0, fill=HIGHLIGHT, outline="", **hidden),
+            "image": c.create_image(0, 0, anchor="nw", **hidden),
+            "face": c.create_rectangle(0, 0, 0, 0, fill="white", outline="#111", **hidden),
+            "rank": c.create_text(0, 0, font=("Arial", 12, "bold"), **hidden),
+            "suit": c.create_text(0, 0, font=("Arial", 28), **hidden),
+            "back": c.create_rectangle(0, 0, 0, 0, fill="#406080", outline="white", **hidden),
+            "empty": c.create_rectangle(0, 0, 0, 0, outline=EMPTY_OUTLINE, width=2, **hidden),
+        }
+        if target == STOCK:
+            items["outline"] = c.create_rectangle(0, 0, 0, 0, outline=HIGHLIGHT, width=3, state="hidden",
+                                                  tags=("highlight",))
+            items["label"] = c.create_text(0, 0, fill="#ccc", tags=(tag,))
+        self._place(target, items)
+        return items
+
+    def _place(self, target, items):
+        c = self.canvas
+        x, y = self.layout.origins[target]
+        w, h = settings.CARD_W, settings.CARD_H
+        c.coords(items["select"], x - 3, y - 3, x + w + 3, y + h + 3)
+        c.coords(items["image"], x, y)
+        for name in ("face", "back", "empty"):
+            c.coords(items[name], x, y, x + w, y + h)
+        c.coords(items["rank"], x + 10, y + 15)
+        c.coords(items["suit"], x + w / 2, y + h / 2)
+        if target == STOCK:
+            c.coords(items["outline"], x - 3, y - 3, x + w + 3, y + h + 3)
+            c.coords(items["label"], x + w / 2, y - 15)
+
+    def relayout(self):
+        """Moves every item if the canvas width changed since the last layout."""
+        width = self._canvas_width()
+        if width == self.layout.width: return False
+        self.layout = BoardLayout(width)
+        for target, items in self.items.items():
+            self._place(target, items)
+        return True
+
+    # --- Drawing ---
+    def render(self, pyramid, stock, waste, selected):
+        """Brings every slot up to date; returns how many slots changed."""
+        want = {}
+        for idx in range(PYRAMID_SLOTS):
+            card = pyramid[idx] if idx < len(pyramid) else "**"
+            want[idx] = ("card", card, card in selected) if card != "**" else ("none", None, False)
+
+        if stock and stock[0] != "**":
+            want[STOCK] = ("back", f"Stock ({len(stock)})", "stock_pile" in selected)
+        else:
+            want[STOCK] = ("empty", "Empty", "stock_pile" in selected)
+
+        top = waste[0] if waste else None
+        if isinstance(top, models.Card):
+            want[WASTE] = ("card", top, top in selected)
+        else:
+            want[WASTE] = ("empty", None, False)
+
+        changed = 0
+        for target, state in want.items():
+            if self.shown[target] != state:
+                self._show(target, *state)
+                self.shown[target] = state
+                changed += 1
+        return changed
+
+    def _show(self, target, kind, what, selected):
+        c = self.canvas
+        items = self.items[target]
+        visible = set()
+
+        if kind == "card":
+            img = self.atlas.image(what.number) if self.atlas else None
+            if img:
+                c.itemconfigure(items["image"], image=img)
+                visible.add("image")
+            else:
+                color = what.get_color()
+                c.itemconfigure(items["rank"], text=what.get_display_rank(), fill=color)
+                c.itemconfigure(items["suit"], text=what.get_suit_symbol(), fill=color)
+                visible.update(("face", "rank", "suit"))
+            if selected: visible.add("select")
+        elif kind == "back":
+            img = self.atlas.image(card_atlas.BACK) if self.atlas else None
+            if img:
+                c.itemconfigure(items["image"], image=img)
+                visible.add("image")
+            else:
+                visible.add("back")
+        elif kind == "empty":
+            visible.add("empty")
+
+        if target == STOCK:
+            c.itemconfigure(items["label"], text=what)
+            visible.add("label")
+            if selected: visible.add("outline")
+
+        for name, item in items.items():
+            c.itemconfigure(item, state="normal" if name in visible else "hidden")
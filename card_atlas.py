@@ -0,0 +1,141 @@
+# card_atlas.py
+# Pre-scaled card sprites, cached on disk.
+#
+# Decoding 53 JPEGs and LANCZOS-resizing them is the same work on every
+# launch for a given screen. The first launch at a card size does it once
+# and saves the results as one sprite atlas (a PNG grid: suits by row,
+# ranks by column, the card back alone on the last row) plus a small JSON
+# index. Later launches open that single file and only cut out and wrap
+# in a PhotoImage the cards that are actually drawn, the first time each
+# one is needed.
+#
+# The index records the card size and the size and modification time of
+# every source image (and which cards made it in), so the atlas is
+# rebuilt when SCALE (and with it the card size) or any image in the
+# asset folder changes.
+import json
+import os
+
+import config
+
+try:
+    from PIL import Image, ImageTk
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+# Bump when the atlas layout changes, to invalidate old cache files
+ATLAS_VERSION = 1
+
+COLUMNS = 13
+BACK = "back"
+
+def source_names():
+    """Atlas keys in cell order: card numbers 1-52, then the back."""
+    return [str(n) for n in range(1, 53)] + [BACK]
+
+def cell_of(key):
+    """(column, row) of a key in the atlas grid."""
+    if key == BACK: return 0, 4
+    n = int(key) - 1
+    return n % COLUMNS, n // COLUMNS
+
+def find_sources(asset_dir):
+    """Key -> image path for the assets present (file name case ignored)."""
+    try:
+        files = {name.lower(): name for name in os.listdir(asset_dir)}
+    except OSError:
+        return {}
+    out = {}
+    for key in source_names():
+        name = files.get(f"{key}.jpg")
+        if name: out[key] = os.path.join(asset_dir, name)
+    return out
+
+def fingerprint(sources, size):
+    """What the cached atlas must match: version, card size and each source file's size and mtime."""
+    files = {}
+    for key, path in sorted(sources.items()):
+        st = os.stat(path)
+        files[key] = [st.st_size, st.st_mtime_ns]
+    return {"version": ATLAS_VERSION, "size": list(size), "files": files}
+
+class CardAtlas:
+    """
+    Card images at one size. image(key) returns a PhotoImage for a card
+    number (or "back"), or None when there is no image for it; nothing
+    is decoded before the first call. Needs a Tk root to exist by then.
+    """
+
+    def __init__(self, asset_dir, card_w, card_h, cache_dir=None):
+        self.asset_dir = asset_dir
+        self.size = (card_w, card_h)
+        self.cache_dir = cache_dir or config.ATLAS_CACHE_DIR
+        self.sheet = None
+        self.present = set()
+        self.photos = {}
+
+    @property
+    def path(self):
+        w, h = self.size
+        return os.path.join(self.cache_dir, f"atlas_{w}x{h}.png")
+
+    def image(self, key):
+        key = str(key)
+        photo = self.photos.get(key)
+        if photo is None and HAS_PIL:
+            if self.sheet is None: self.load()
+            if key in self.present:
+                w, h = self.size
+                col, row = cell_of(key)
+                tile = self.sheet.crop((col * w, row * h, (col + 1) * w, (row + 1) * h))
+                photo = self.photos[key] = ImageTk.PhotoImage(tile)
+        return photo
+
+    # --- Cache ---
+    def load(self):
+        """Opens the cached atlas, rebuilding it first if it is missing or stale."""
+        sources = find_sources(self.asset_dir)
+        stamp = fingerprint(sources, self.size)
+        index_path = os.path.splitext(self.path)[0] + ".json"
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+            if index["stamp"] == stamp:
+                sheet = Image.open(self.path)
+                sheet.load()
+                self.sheet, self.present = sheet, set(index["cards"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        if self.sheet is None:
+            self.sheet = self.build(sources)
+            self.save(self.sheet, index_path, {"stamp": stamp, "cards": sorted(self.present)})
+
+    def build(self, sources):
+        """Decodes and scales every source into a new atlas; unreadable images are left out."""
+        w, h = self.size
+        self.present = set()
+        sheet = Image.new("RGB", (COLUMNS * w, 5 * h))
+        for key, path in sources.items():
+            col, row = cell_of(key)
+            try:
+                with Image.open(path) as img:
+                    sheet.paste(img.convert("RGB").resize((w, h), Image.LANCZOS), (col * w, row * h))
+                self.present.add(key)
+            except OSError:
+                pass
+        return sheet
+
+    def save(self, sheet, index_path, index):
+        """Writes atlas and index atomically; a read-only cache folder just means no cache."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = self.path + ".tmp"
+            sheet.save(tmp, "PNG", compress_level=1)
+            os.replace(tmp, self.path)
+            with open(index_path + ".tmp", "w") as f:
+                json.dump(index, f)
+            os.replace(index_path + ".tmp", index_path)
+        except OSError:
+            pass
@@ -0,0 +1,43 @@
+# config.py
+# Static constants for the rules/search core. Nothing here touches the
+# display, so solvers, benchmark workers and batch tools can import it
+# on headless machines. Screen-dependent values live in settings.py.
+import os
+
+ASSET_DIR = "Carded"
+
+AI_STEP_DELAY_MS = 600
+DFS_MAX_NODES = 200000
+ASTAR_MAX_NODES = 150000
+IDASTAR_MAX_NODES = 300000    # expansions over all IDA* passes
+ASTAR_BATCH_SIZE = 64         # nodes per expansion batch (see batch_astar.py)
+PORTFOLIO_MAX_NODES = 200000   # per racing worker (see portfolio.py)
+
+# GUI solves always count nodes, duplicates and branching (instrument.py)
+# for the exported file; set this to also time move generation, heuristics
+# and hashing. Off by default, since the timers slow every solve down
+TRACE_GUI_SEARCHES = False
+
+# Transposition table (bounded visited set) used by batch runs
+TT_BUDGET_BYTES = 16 * 1024 * 1024
+TT_POLICY = "depth"
+# IDA* keeps a small table of its own when none is passed in (0 = path checks only)
+IDASTAR_TT_BUDGET_BYTES = 1024 * 1024
+
+# Persistent solver results (see solution_cache.py)
+SOLUTION_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".pyramid_solitaire", "solutions.sqlite3")
+SOLUTION_CACHE_MAX_ENTRIES = 100000
+
+# Pre-scaled card sprite atlases, one per card size (see card_atlas.py)
+ATLAS_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".pyramid_solitaire", "atlas")
+
+# Endgame memo (see endgame.py): positions with this many pyramid cards
+# or fewer are settled by table lookup; 0 turns the memo off
+ENDGAME_MAX_CARDS = 10
+ENDGAME_MAX_NODES = 20000     # per probe that misses the table
+ENDGAME_MAX_ENTRIES = 200000
+# Disk copy of the memo, attached by the GUI only. Benchmarks keep theirs
+# in memory, so one run's endgames do not speed up the next; set this to
+# have them share the disk copy too
+ENDGAME_MEMO_PATH = os.path.join(os.path.expanduser("~"), ".pyramid_solitaire", "endgames.sqlite3")
+BENCHMARK_MEMO_ON_DISK = False
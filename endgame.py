@@ -0,0 +1,239 @@
+# endgame.py
+# Memo of solved and unsolvable endgames, shared by every search in the
+# process and optionally kept on disk.
+#
+# Near the end of a game the same few cards keep turning up, in different
+# branches of one search and in different deals of a benchmark run. Suits
+# never matter for pairing, and in the cursor-free model (see engine.py)
+# neither does the stock order, so an endgame is keyed by the rank in each
+# remaining pyramid slot plus how many cards of each rank are left in stock
+# and waste. The same key in another deal is the same endgame.
+#
+# A position with at most `max_cards` pyramid cards is settled by probe():
+# a table lookup, or on a miss a small exhaustive search whose every
+# settled sub-position goes into the table too. Stored solutions refer to
+# pyramid slots and stock ranks rather than card numbers, and are turned
+# back into move codes for the deal at hand.
+#
+# The disk copy is an sqlite3 file (as in solution_cache.py). It is only
+# used when asked for (the GUI does): rows are read one at a time as the
+# in-memory table misses them, and flush() appends the new ones.
+import os
+import sqlite3
+import time
+
+import config
+import engine
+
+# Operands of a stored move: pyramid slot + 1 (1-28), or STOCK_RANK + rank
+# for a stock/waste card; 0 is "no second card"
+STOCK_RANK = 32
+UNSOLVABLE = False
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS endgames (
+    position BLOB PRIMARY KEY,
+    moves    TEXT
+);
+"""
+
+# The deadline is checked once per this many probe nodes
+CHECK_MASK = 255
+
+class _OutOfBudget(Exception):
+    pass
+
+def endgame_key(layout, state):
+    """Rank in each pyramid slot (0 when empty), then the stock/waste rank census."""
+    pyr = state & engine.PYRAMID_ALL
+    out = bytearray(engine.PYRAMID_SIZE + 14)
+    for i, r in enumerate(layout.pyr_ranks):
+        if pyr >> i & 1: out[i] = r
+    left = layout.stock_full & ~(state >> engine.STOCK_SHIFT)
+    while left:
+        low = left & -left
+        out[engine.PYRAMID_SIZE + layout.stock_ranks[low.bit_length() - 1]] += 1
+        left ^= low
+    return bytes(out)
+
+class EndgameMemo:
+    """
+    Endgame verdicts for positions with at most `max_cards` pyramid cards.
+    probe() answers a tuple of move codes finishing the game, False when
+    no line does, or None when the position is too big or its search ran
+    out of nodes or time. `nodes` counts every node the probes searched,
+    so callers can charge them to their own budget. At most `max_entries`
+    verdicts (and as many given-up positions) are kept in memory; past
+    that the oldest insertion makes room, as in solution_cache.py.
+    """
+
+    def __init__(self, max_cards=None, max_nodes=None, max_entries=None, path=None):
+        self.max_cards = config.ENDGAME_MAX_CARDS if max_cards is None else max_cards
+        self.max_nodes = max_nodes or config.ENDGAME_MAX_NODES
+        self.max_entries = max_entries or config.ENDGAME_MAX_ENTRIES
+        self.entries = {}
+        self.gave_up = {}
+        self.unsaved = {}
+        self.db = None
+
+        self.hits = 0
+        self.misses = 0
+        self.nodes = 0
+        self.evictions = 0
+        if path: self.open(path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    # --- Lookup ---
+    def probe(self, layout, state, acc, max_nodes=None, deadline=None):
+        """
+        Verdict for `state` (see the class docstring). A miss searches at
+        most min(`max_nodes`, self.max_nodes) nodes and stops once
+        time.perf_counter() passes `deadline`.
+        """
+        if bin(state & engine.PYRAMID_ALL).count("1") > self.max_cards: return None
+        key = endgame_key(layout, state)
+        tail = self.get(key)
+        if tail is None:
+            self.misses += 1
+            if key in self.gave_up: return None
+            own_limit = max_nodes is None or max_nodes >= self.max_nodes
+            budget = [self.max_nodes if own_limit else max_nodes]
+            try:
+                tail = self._solve(layout, state, acc, key, budget, deadline)
+            except _OutOfBudget:
+                # Only a search that used the memo's whole allowance says
+                # the position is too big to try again
+                if own_limit and budget[0] < 0: self._remember(self.gave_up, key, True)
+                return None
+        else:
+            self.hits += 1
+        if tail is UNSOLVABLE: return False
+        return self.codes(layout, state, tail)
+
+    def _solve(self, layout, state, acc, key, budget, deadline):
+        """Exhaustive search below `state`; every position it settles is stored."""
+        if not state & engine.PYRAMID_ALL: return ()
+        budget[0] -= 1
+        self.nodes += 1
+        if budget[0] < 0: raise _OutOfBudget
+        if deadline is not None and not self.nodes & CHECK_MASK and time.perf_counter() > deadline:
+            raise _OutOfBudget
+
+        result = UNSOLVABLE
+        for move, child, child_acc in layout.canonical_successors(state, acc):
+            child_key = endgame_key(layout, child)
+            tail = self.get(child_key)
+            if tail is None: tail = self._solve(layout, child, child_acc, child_key, budget, deadline)
+            if tail is not UNSOLVABLE:
+                result = (self.token(layout, move),) + tail
+                break
+        self.store(key, result)
+        return result
+
+    def get(self, key):
+        """Stored verdict for `key` (from memory, else from disk), or None."""
+        tail = self.entries.get(key)
+        if tail is None and self.db is not None:
+            row = self.db.execute("SELECT moves FROM endgames WHERE position = ?", (key,)).fetchone()
+            if row is not None:
+                tail = UNSOLVABLE if row[0] is None else tuple(int(t) for t in row[0].split(",") if t)
+                self._remember(self.entries, key, tail)
+        return tail
+
+    def store(self, key, tail):
+        self._remember(self.entries, key, tail)
+        if self.db is not None: self.unsaved[key] = tail
+
+    def _remember(self, table, key, value):
+        """Adds to `table` (entries or gave_up), first evicting its oldest key when full."""
+        if len(table) >= self.max_entries:
+            del table[next(iter(table))]
+            self.evictions += 1
+        table[key] = value
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "nodes": self.nodes,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "gave_up": len(self.gave_up),
+            "capacity": self.max_entries,
+        }
+
+    # --- Move translation ---
+    @staticmethod
+    def token(layout, code):
+        """Deal-independent form of a move code."""
+        out = 0
+        for shift, n in ((0, code & 63), (6, code >> 6)):
+            if not n: continue
+            i = layout.pyr_pos.get(n)
+            out |= (i + 1 if i is not None else STOCK_RANK + ((n - 1) % 13) + 1) << shift
+        return out
+
+    @staticmethod
+    def codes(layout, state, tail):
+        """Move codes for `layout` playing a stored line from `state`."""
+        removed = (state >> engine.STOCK_SHIFT) & engine.STOCK_ALL
+        out = []
+        for token in tail:
+            code = 0
+            for shift, op in ((0, token & 63), (6, token >> 6)):
+                if not op: continue
+                if op < STOCK_RANK:
+                    n = layout.pyr_numbers[op - 1]
+                else:
+                    options = layout.stock_rank_bits[op - STOCK_RANK] & ~removed
+                    low = options & -options
+                    removed |= low
+                    n = layout.stock_numbers[low.bit_length() - 1]
+                code |= n << shift
+            out.append(code)
+        return out
+
+    # --- Disk ---
+    def open(self, path):
+        """Looks endgames up in the file at `path` and keeps new ones for flush()."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def flush(self):
+        """Writes the endgames settled since the last flush; returns how many."""
+        if self.db is None or not self.unsaved: return 0
+        rows = [(key, None if tail is UNSOLVABLE else ",".join(map(str, tail)))
+                for key, tail in self.unsaved.items()]
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO endgames VALUES (?, ?)", rows)
+        self.unsaved = {}
+        return len(rows)
+
+    def close(self):
+        self.flush()
+        if self.db is not None: self.db.close()
+        self.db = None
+
+_shared = None
+
+def shared(path=None):
+    """
+    The process-wide memo, or None when config.ENDGAME_MAX_CARDS is 0. It
+    lives in memory only unless a caller passes a `path` (the GUI passes
+    config.ENDGAME_MEMO_PATH); the first such call attaches the disk copy.
+    An unusable file just means no disk copy.
+    """
+    global _shared
+    if _shared is None and config.ENDGAME_MAX_CARDS:
+        _shared = EndgameMemo()
+    if _shared is not None and path and _shared.db is None:
+        try:
+            _shared.open(path)
+        except (OSError, sqlite3.Error):
+            _shared.db = None
+    return _shared
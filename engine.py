@@ -0,0 +1,425 @@
+# engine.py
+# Compact integer state engine used by the solvers.
+#
+# A search node is one packed int instead of four lists of Card objects:
+#   bits  0-27 : pyramid slots still present (bit i = slot i)
+#   bits 28-51 : stock cards already removed (bit j = draw-order index j)
+#   bits 52-56 : stock/waste cursor (how many stock cards have been drawn)
+#
+# Stock and waste never change order, only lose cards, so they are kept as
+# one fixed draw-order sequence. Cards before the cursor are in the waste
+# (the last remaining one is the waste top), cards from the cursor on are
+# still in the stock. The cursor is kept normalized to "waste top + 1",
+# or 0 when the waste is empty, so equal positions always pack equally.
+from models import Card
+import game_logic as gl
+
+PYRAMID_SIZE = 28
+STOCK_SHIFT = 28
+CURSOR_SHIFT = 52
+
+PYRAMID_ALL = (1 << PYRAMID_SIZE) - 1
+STOCK_ALL = (1 << 24) - 1
+
+SLOT_ROW = gl.PYRAMID_ROW_OF
+
+# Cover geometry as bitmasks: slot i is free once nothing in COVERED_BY[i]
+# is present; removing slot i can only free the slots in UNCOVERS[i].
+COVERED_BY = [sum(1 << j for j in gl.PYRAMID_COVERS[i]) for i in range(PYRAMID_SIZE)]
+UNCOVERS = [sum(1 << p for p in range(PYRAMID_SIZE) if i in gl.PYRAMID_COVERS[p])
+            for i in range(PYRAMID_SIZE)]
+
+# Cover chains: BELOW[i] holds every slot that covers slot i directly or
+# indirectly, ABOVE[i] every slot that slot i covers that way. Slot i and a
+# slot in RELATED[i] are never free at the same time, so they never pair.
+BELOW = [0] * PYRAMID_SIZE
+for _i in reversed(range(PYRAMID_SIZE)):
+    BELOW[_i] = COVERED_BY[_i]
+    for _j in gl.PYRAMID_COVERS[_i]: BELOW[_i] |= BELOW[_j]
+ABOVE = [0] * PYRAMID_SIZE
+for _i in range(PYRAMID_SIZE):
+    for _p in range(_i):
+        if UNCOVERS[_i] >> _p & 1: ABOVE[_i] |= (1 << _p) | ABOVE[_p]
+RELATED = [BELOW[i] | ABOVE[i] for i in range(PYRAMID_SIZE)]
+del _i, _j, _p
+
+
+def pack(pyr, removed, cursor):
+    return pyr | (removed << STOCK_SHIFT) | (cursor << CURSOR_SHIFT)
+
+
+def unpack(state):
+    """Returns (pyramid_mask, stock_removed_mask, cursor)."""
+    return (state & PYRAMID_ALL,
+            (state >> STOCK_SHIFT) & STOCK_ALL,
+            state >> CURSOR_SHIFT)
+
+
+# Moves are small ints while searching: 0 = rotate, n = king n,
+# a | b << 6 = pair (a, b). decode_move gives the public tuple form.
+ROTATE = 0
+
+
+def decode_move(code):
+    if code == ROTATE: return ("rotate",)
+    if code >> 6: return ("pair", code & 63, code >> 6)
+    return ("king", code)
+
+
+def iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Layout:
+    """
+    Per-deal lookup tables: which card sits in each pyramid slot and in
+    each stock draw position. Built once per search; states only refer to
+    positions, never to Card objects.
+    """
+
+    def __init__(self, pyramid_numbers, stock_numbers):
+        self.pyr_numbers = list(pyramid_numbers)
+        self.pyr_ranks = [((n - 1) % 13) + 1 if n else 0 for n in self.pyr_numbers]
+        self.stock_numbers = list(stock_numbers)
+        self.stock_ranks = [((n - 1) % 13) + 1 for n in self.stock_numbers]
+        self.stock_size = len(self.stock_numbers)
+        self.stock_pos = {n: j for j, n in enumerate(self.stock_numbers)}
+        self.pyr_pos = {n: i for i, n in enumerate(self.pyr_numbers) if n}
+        self.stock_full = (1 << self.stock_size) - 1
+
+        # Rank buckets: RANK -> mask of pyramid slots holding that rank
+        self.rank_slots = [0] * 14
+        for i, r in enumerate(self.pyr_ranks):
+            if r: self.rank_slots[r] |= 1 << i
+        self.king_slots = self.rank_slots[13]
+
+        # Stock draw positions by rank, and for each pyramid card the slots
+        # of complement rank outside its cover chain (its only possible
+        # pyramid partners). Empty slots (number 0) are absent for good.
+        self.stock_rank_bits = [0] * 14
+        for j, r in enumerate(self.stock_ranks):
+            self.stock_rank_bits[r] |= 1 << j
+        # Stock positions whose card pairs with the card in each slot
+        self.slot_stock_partners = [self.stock_rank_bits[13 - r] if 0 < r < 13 else 0
+                                    for r in self.pyr_ranks]
+        # Cover chains only keep cards apart when every card that a present
+        # card covers is present too, as in any position reached from a
+        # full deal; otherwise fall back to plain rank counting
+        present = sum(1 << i for i, n in enumerate(self.pyr_numbers) if n)
+        closed = all(not present >> i & 1 or not UNCOVERS[i] & ~present for i in range(PYRAMID_SIZE))
+        self.partner_slots = [self.rank_slots[13 - r] & ~(RELATED[i] if closed else 0) if 0 < r < 13 else 0
+                              for i, r in enumerate(self.pyr_ranks)]
+
+    @classmethod
+    def from_lists(cls, pyramid, stock, waste):
+        """
+        Converts the GUI/rules representation (lists of Card and "**") into
+        a Layout plus the packed start state.
+        """
+        pyr_numbers = [c.number if isinstance(c, Card) else 0 for c in pyramid]
+        pyr_numbers += [0] * (PYRAMID_SIZE - len(pyr_numbers))
+
+        # Waste is stored top-first, so its oldest card was drawn first
+        waste_cards = [c.number for c in waste if isinstance(c, Card)]
+        stock_cards = [c.number for c in stock if isinstance(c, Card)]
+        layout = cls(pyr_numbers, list(reversed(waste_cards)) + stock_cards)
+
+        pyr = 0
+        for i, n in enumerate(pyr_numbers):
+            if n: pyr |= 1 << i
+        return layout, pack(pyr, 0, len(waste_cards))
+
+    def to_lists(self, state):
+        """Rebuilds (pyramid, stock, waste) lists of Card / "**" for a state."""
+        pyr, removed, cursor = unpack(state)
+        pyramid = [Card(self.pyr_numbers[i]) if pyr >> i & 1 else "**"
+                   for i in range(PYRAMID_SIZE)]
+        stock = [Card(self.stock_numbers[j]) for j in range(cursor, self.stock_size)
+                 if not removed >> j & 1]
+        waste = [Card(self.stock_numbers[j]) for j in range(cursor - 1, -1, -1)
+                 if not removed >> j & 1]
+        return pyramid, stock, waste or ["**"]
+
+    # --- Queries ---
+    def accessible(self, pyr):
+        """Pyramid slots whose covering cards are both gone (full scan)."""
+        acc = 0
+        m = pyr
+        while m:
+            low = m & -m
+            if not pyr & COVERED_BY[low.bit_length() - 1]:
+                acc |= low
+            m ^= low
+        return acc
+
+    def release(self, pyr, acc, gone):
+        """
+        Updates an accessible mask after the slots in `gone` were removed
+        from the pyramid (pyr is the mask after removal). Only the slots the
+        removed cards were covering need to be re-checked.
+        """
+        acc &= pyr
+        cand = 0
+        while gone:
+            low = gone & -gone
+            cand |= UNCOVERS[low.bit_length() - 1]
+            gone ^= low
+        cand &= pyr & ~acc
+        while cand:
+            low = cand & -cand
+            if not pyr & COVERED_BY[low.bit_length() - 1]:
+                acc |= low
+            cand ^= low
+        return acc
+
+    def can_rotate(self, removed, cursor):
+        return cursor > 0 or (self.stock_full & ~removed) != 0
+
+    # --- Moves (pure integer operations) ---
+    def remove_waste_top(self, removed, cursor):
+        """Removes the waste top (index cursor - 1); returns (removed, cursor)."""
+        removed |= 1 << (cursor - 1)
+        below = ~removed & ((1 << (cursor - 1)) - 1)
+        return removed, below.bit_length()
+
+    def rotate(self, removed, cursor):
+        """Draws the next stock card, or recycles the waste when the stock is empty."""
+        ahead = self.stock_full & ~removed & ~((1 << cursor) - 1)
+        if ahead:
+            return (ahead & -ahead).bit_length()
+        return 0
+
+    def successors(self, state, acc):
+        """
+        Returns [(move_code, child_state, child_acc), ...]: kings, then
+        pairs, then rotate. `acc` is the accessible pyramid mask of `state`.
+        """
+        pyr = state & PYRAMID_ALL
+        removed = (state >> STOCK_SHIFT) & STOCK_ALL
+        cursor = state >> CURSOR_SHIFT
+        base = state & ~PYRAMID_ALL
+        pyr_numbers = self.pyr_numbers
+        rank_slots = self.rank_slots
+        out = []
+
+        # Waste top (the only playable stock/waste card)
+        if cursor:
+            w_num = self.stock_numbers[cursor - 1]
+            w_rank = self.stock_ranks[cursor - 1]
+            w_removed, w_cursor = self.remove_waste_top(removed, cursor)
+            w_base = pack(0, w_removed, w_cursor)
+
+        # 1. Kings
+        if cursor and w_rank == 13:
+            out.append((w_num, pyr | w_base, acc))
+        m = acc & self.king_slots
+        while m:
+            low = m & -m
+            child_pyr = pyr ^ low
+            out.append((pyr_numbers[low.bit_length() - 1],
+                        child_pyr | base, self.release(child_pyr, acc, low)))
+            m ^= low
+
+        # 2. Pairs: look each card up directly against its complement rank
+        if cursor and w_rank != 13:
+            m = acc & rank_slots[13 - w_rank]
+            while m:
+                low = m & -m
+                child_pyr = pyr ^ low
+                out.append((w_num | pyr_numbers[low.bit_length() - 1] << 6,
+                            child_pyr | w_base, self.release(child_pyr, acc, low)))
+                m ^= low
+
+        for r in range(1, 7):
+            lo = acc & rank_slots[r]
+            if not lo: continue
+            hi = acc & rank_slots[13 - r]
+            while lo:
+                a = lo & -lo
+                m = hi
+                while m:
+                    b = m & -m
+                    gone = a | b
+                    child_pyr = pyr ^ gone
+                    out.append((pyr_numbers[a.bit_length() - 1] | pyr_numbers[b.bit_length() - 1] << 6,
+                                child_pyr | base, self.release(child_pyr, acc, gone)))
+                    m ^= b
+                lo ^= a
+
+        # 3. Rotate
+        if cursor or self.stock_full & ~removed:
+            out.append((ROTATE, pack(pyr, removed, self.rotate(removed, cursor)), acc))
+
+        return out
+
+    def stranded(self, state, ranks=range(1, 13)):
+        """
+        Pyramid slots (of the given ranks) whose card can never be removed:
+        no card of the complement rank is left in stock or waste, and every
+        one left in the pyramid sits in the card's own cover chain. Any
+        such slot means the state is unsolvable. Removing cards only takes
+        partners away, so every descendant of a stranded state is stranded.
+        """
+        pyr = state & PYRAMID_ALL
+        stock_left = self.stock_full & ~(state >> STOCK_SHIFT)
+        out = 0
+        for r in ranks:
+            slots = self.rank_slots[r] & pyr
+            if not slots or stock_left & self.stock_rank_bits[13 - r]: continue
+            while slots:
+                low = slots & -slots
+                if not self.partner_slots[low.bit_length() - 1] & pyr: out |= low
+                slots ^= low
+        return out
+
+    # --- Canonical move layer ---
+    # Recycling the waste is unlimited, so any card left in stock or waste
+    # can be rotated to the waste top. The canonical layer therefore drops
+    # the cursor (its states always have cursor 0) and offers each useful
+    # stock card directly, as one "advance to it and play it" move;
+    # moves() puts the rotates back for replay. A rotate on its own never
+    # appears: it only matters for the card it brings to the waste.
+    def forced_move(self, state, acc):
+        """
+        A free pyramid king, or a king anywhere in stock/waste, can always
+        be taken at once: removing it never blocks another card. Returns
+        that single (move, child, child_acc), or None.
+        """
+        pyr = state & PYRAMID_ALL
+        removed = (state >> STOCK_SHIFT) & STOCK_ALL
+        kings = self.stock_rank_bits[13] & ~removed
+        if kings:
+            low = kings & -kings
+            return (self.stock_numbers[low.bit_length() - 1], pack(pyr, removed | low, 0), acc)
+        kings = acc & self.king_slots
+        if kings:
+            low = kings & -kings
+            child_pyr = pyr ^ low
+            return (self.pyr_numbers[low.bit_length() - 1],
+                    pack(child_pyr, removed, 0), self.release(child_pyr, acc, low))
+        return None
+
+    def canonical_successors(self, state, acc, last_gone=0, parent_acc=0):
+        """
+        Moves of the cursor-free model (see above) with forced kings
+        applied and commuting removals expanded in one order only.
+
+        `last_gone` is the pyramid mask removed by the pair move that led
+        here and `parent_acc` the accessible mask before it (0 after a
+        king or at the root). A pyramid-only move whose cards were already
+        free in the parent and whose mask sorts below `last_gone` reaches
+        a state the sibling branch "that move first, then the last one"
+        covers, so it is skipped here.
+
+        Pairs that leave a card of either removed rank stranded (see
+        stranded()) are dropped as dead ends.
+        """
+        state &= ~(31 << CURSOR_SHIFT)
+        forced = self.forced_move(state, acc)
+        if forced: return [forced]
+
+        kept = []
+        # Pyramid pairs (successors() of a cursor-0 state has no waste top)
+        for item in self.successors(state, acc):
+            move, child = item[0], item[1]
+            if move == ROTATE: continue
+            if last_gone:
+                gone = (state ^ child) & PYRAMID_ALL
+                if gone < last_gone and not gone & ~parent_acc: continue
+            r = (move & 63) % 13 or 13
+            if self.stranded(child, (r, 13 - r)): continue
+            kept.append(item)
+
+        # Stock/waste card with a free pyramid card, nearest draw first
+        pyr = state & PYRAMID_ALL
+        removed = (state >> STOCK_SHIFT) & STOCK_ALL
+        left = self.stock_full & ~removed
+        m = acc
+        while m:
+            low = m & -m
+            i = low.bit_length() - 1
+            partners = left & self.slot_stock_partners[i]
+            m ^= low
+            if not partners: continue
+            child_pyr = pyr ^ low
+            child_acc = self.release(child_pyr, acc, low)
+            r = self.pyr_ranks[i]
+            while partners:
+                b = partners & -partners
+                child = pack(child_pyr, removed | b, 0)
+                if not self.stranded(child, (r, 13 - r)):
+                    kept.append((self.stock_numbers[b.bit_length() - 1] | self.pyr_numbers[i] << 6,
+                                 child, child_acc))
+                partners ^= b
+        return kept
+
+    def moves(self, start, codes):
+        """
+        Public move list for a line of move codes played from `start`,
+        with the rotates that bring each stock card to the waste top put
+        back in. A canonical line (no rotate codes) is also reordered:
+        its moves only need their pyramid cards to be free, so each step
+        plays the free move that needs the fewest rotates.
+        """
+        pyr, removed, cursor = unpack(start)
+        pending = list(codes)
+        in_order = ROTATE in pending
+        acc = self.accessible(pyr)
+        out = []
+        while pending:
+            if in_order:
+                code = pending.pop(0)
+            else:
+                pick = min(range(len(pending)), key=lambda k: self._rotates_for(pending[k], pyr, acc, removed, cursor))
+                code = pending.pop(pick)
+            if code == ROTATE:
+                cursor = self.rotate(removed, cursor)
+                out.append(("rotate",))
+                continue
+
+            gone = 0
+            for n in (code & 63, code >> 6):
+                i = self.pyr_pos.get(n)
+                if i is not None:
+                    gone |= 1 << i
+                    continue
+                j = self.stock_pos.get(n)
+                if j is None: continue
+                if removed >> j & 1: raise ValueError(f"Card {n} was already removed")
+                while cursor - 1 != j:
+                    cursor = self.rotate(removed, cursor)
+                    out.append(("rotate",))
+                removed, cursor = self.remove_waste_top(removed, cursor)
+            if gone:
+                pyr ^= gone
+                acc = self.release(pyr, acc, gone)
+            out.append(decode_move(code))
+        return out
+
+    def _rotates_for(self, code, pyr, acc, removed, cursor):
+        """Rotates needed before `code` can be played (a large number while its pyramid cards are covered)."""
+        need = 0
+        for n in (code & 63, code >> 6):
+            i = self.pyr_pos.get(n)
+            if i is not None:
+                if not acc >> i & 1: return 1 << 30
+                continue
+            j = self.stock_pos.get(n)
+            if j is None or j == cursor - 1: continue
+            left = self.stock_full & ~removed
+            ahead = left & ~((1 << cursor) - 1)
+            if j >= cursor:
+                need = bin(ahead & ((2 << j) - 1)).count("1")
+            else:
+                need = bin(ahead).count("1") + 1 + bin(left & ((2 << j) - 1)).count("1")
+        return need
+
+
+def last_pair_gone(move, parent, state):
+    """Pyramid mask removed by `move` when it was a pair, else 0 (no reduction context)."""
+    if move >> 6:
+        return (parent ^ state) & PYRAMID_ALL
+    return 0
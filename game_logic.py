@@ -18,33 +18,22 @@ def get_move_string(move):
     elif move[0] == "rotate":
         return "Rotate Stock"
     return ""
-# Rotates the stock and waste piles according to game rules
-def stock_rotate(stock, waste):
-    stock = list(stock)
-    waste = list(waste)
-
-    # Remove empty marker if present at top of waste
-    if len(waste) > 0 and waste[0] == "**":
-        waste.pop(0)
-
-    if len(stock) != 0:
-        # Move top of Stock (Face Down) to top of Waste (Face Up)
-        card = stock.pop(0)
-        waste.insert(0, card)
-    else:
-        # Recycle Waste back to Stock
-        if len(waste) > 0:
-            stock.extend(reversed(waste))
-            waste.clear()
-        waste.append("**")
-    
-    return stock, waste
 
 def pyramid_rows_from_list(p):
     return [
         [p[0]], p[1:3], p[3:6], p[6:10], p[10:15], p[15:21], p[21:28],
     ]
 
+# Slot i (row r) is covered by the two slots directly beneath it,
+# i + r + 1 and i + r + 2. The bottom row is never covered.
+PYRAMID_ROW_OF = [r for r in range(7) for _ in range(r + 1)]
+PYRAMID_COVERS = [
+    (i + r + 1, i + r + 2) if r < 6 else () for i, r in enumerate(PYRAMID_ROW_OF)
+]
+PYRAMID_BOTTOM_UP = sorted(range(28), key=lambda i: (-PYRAMID_ROW_OF[i], i))
+# Slots that slot i covers (the inverse of PYRAMID_COVERS)
+PYRAMID_UNCOVERS = [tuple(p for p in range(28) if i in PYRAMID_COVERS[p]) for i in range(28)]
+
 def get_accessible_cards(pyramid, stock, waste):
     acc = []
     
@@ -55,53 +44,184 @@ def get_accessible_cards(pyramid, stock, waste):
 
     # Stock Top
 
-    rows = pyramid_rows_from_list(pyramid)
-
-    # Bottom Row
-    for c in rows[6]:
-        if c != "**": acc.append(c)
-
-    # Upper Rows (only if row below is cleared)
-    for r in range(5, -1, -1):
-        if all(c == "**" for c in rows[r+1]):
-            for c in rows[r]:
-                if c != "**": acc.append(c)
+    # Pyramid (bottom row first): a card is free once both cards covering it are gone
+    for i in PYRAMID_BOTTOM_UP:
+        c = pyramid[i]
+        if c == "**": continue
+        if all(pyramid[j] == "**" for j in PYRAMID_COVERS[i]):
+            acc.append(c)
     return acc
 
-def is_valid_source_pair(a, b, pyramid):
-   
-    a_in_pyr = (a in pyramid)
-    b_in_pyr = (b in pyramid)
-    
-    if not a_in_pyr and not b_in_pyr:
-        return False
-        
-    return True
-
-def removeCards_obj(a, b, pyramid, stock, waste, foundation):
-    accessible = get_accessible_cards(pyramid, stock, waste)
-
-    def remove_card(c):
-        if c not in accessible: return
-        
-        for i in range(len(pyramid)):
-            if pyramid[i] == c:
-                foundation.append(pyramid[i])
-                pyramid[i] = "**"
-        
-        if len(stock) > 0 and stock[0] == c:
-            foundation.append(stock.pop(0))
-        
-        if len(waste) > 0 and waste[0] == c:
-            foundation.append(waste.pop(0))
-
-    if a != "none": remove_card(a)
-    if b != "none": remove_card(b)
-
-    return pyramid, stock, waste, foundation
-
 def encode_list_for_state(lst):
     return tuple(x.number if isinstance(x, Card) else 0 for x in lst)
 
 def is_pyramid_cleared(p):
-    return all(c == "**" or c is None for c in p)
\ No newline at end of file
+    return all(c == "**" or c is None for c in p)
+
+class GameState:
+    """
+    One game position that is changed in place, move by move.
+
+    Keeps a card number -> location index, so cards are found without
+    scanning, and a count of the cards still covering each pyramid slot,
+    so accessibility is a lookup. Stock and waste are one doubly linked
+    pile in draw order with a cursor at the stock top: drawing or
+    recycling moves the cursor, removing the waste top unlinks it.
+    apply() and undo() are O(1), and undo() steps back through every
+    move applied so far.
+
+    Moves use the solvers' tuples: ("rotate",), ("king", n) and
+    ("pair", a, b) with card numbers.
+    """
+
+    def __init__(self, pyramid, stock, waste, foundation=None):
+        self.pyramid = list(pyramid)
+        self.foundation = list(foundation or [])
+        self.history = []
+        self.cards = {}
+        self.slot_of = {}   # number -> pyramid slot
+        self.pos_of = {}    # number -> pile position
+
+        # Present covering cards per slot; 0 means free
+        self.covered = [0] * len(self.pyramid)
+        for i, c in enumerate(self.pyramid):
+            if c == "**" or c is None: continue
+            self.cards[c.number] = c
+            self.slot_of[c.number] = i
+            for p in PYRAMID_UNCOVERS[i]: self.covered[p] += 1
+
+        # Waste is stored top-first, so its oldest card was drawn first
+        waste_cards = [c for c in waste if isinstance(c, Card)]
+        self.pile = list(reversed(waste_cards)) + [c for c in stock if isinstance(c, Card)]
+        n = len(self.pile)
+        self.head, self.tail = n, n + 1
+        order = [self.head] + list(range(n)) + [self.tail]
+        self.nxt = [0] * (n + 2)
+        self.prv = [0] * (n + 2)
+        for a, b in zip(order, order[1:]):
+            self.nxt[a] = b
+            self.prv[b] = a
+        self.gone = [False] * n
+        self.cursor = len(waste_cards) if len(waste_cards) < n else self.tail
+        for j, c in enumerate(self.pile):
+            self.cards[c.number] = c
+            self.pos_of[c.number] = j
+
+    # --- Views (GUI lists: top card first, "**" for empty) ---
+    @property
+    def stock(self):
+        out = []
+        j = self.cursor
+        while j != self.tail:
+            out.append(self.pile[j])
+            j = self.nxt[j]
+        return out
+
+    @property
+    def waste(self):
+        out = []
+        j = self.prv[self.cursor]
+        while j != self.head:
+            out.append(self.pile[j])
+            j = self.prv[j]
+        return out or ["**"]
+
+    def waste_top(self):
+        j = self.prv[self.cursor]
+        return self.pile[j] if j != self.head else None
+
+    def lists(self):
+        """(pyramid, stock, waste) copies, as the solvers and the solution cache take them."""
+        return list(self.pyramid), self.stock, self.waste
+
+    # --- Queries ---
+    def find(self, number):
+        """The card with this number if it is still in play, else None."""
+        c = self.cards.get(number)
+        if c is None: return None
+        i = self.slot_of.get(number)
+        if i is not None:
+            return c if self.pyramid[i] is c else None
+        return None if self.gone[self.pos_of[number]] else c
+
+    def in_pyramid(self, card):
+        i = self.slot_of.get(card.number)
+        return i is not None and self.pyramid[i] is card
+
+    def is_accessible(self, card):
+        i = self.slot_of.get(card.number)
+        if i is not None:
+            return self.pyramid[i] is card and not self.covered[i]
+        return self.waste_top() is card
+
+    def accessible(self):
+        """Same cards, in the same order, as get_accessible_cards()."""
+        acc = []
+        top = self.waste_top()
+        if top is not None: acc.append(top)
+        for i in PYRAMID_BOTTOM_UP:
+            if i < len(self.pyramid) and self.pyramid[i] != "**" and not self.covered[i]:
+                acc.append(self.pyramid[i])
+        return acc
+
+    def is_cleared(self):
+        return is_pyramid_cleared(self.pyramid)
+
+    def is_legal(self, move):
+        if move[0] == "rotate": return True
+        cards = [self.find(n) for n in move[1:]]
+        if not all(c is not None and self.is_accessible(c) for c in cards): return False
+        if move[0] == "king": return len(cards) == 1 and is_king(cards[0])
+        return (len(cards) == 2 and cards[0] is not cards[1] and cards[0].rank + cards[1].rank == 13
+                and any(self.in_pyramid(c) for c in cards))
+
+    # --- Moves ---
+    def apply(self, move):
+        """Plays a move; raises ValueError if it is not legal here."""
+        if not self.is_legal(move):
+            raise ValueError(f"Illegal move: {move!r}")
+        if move[0] == "rotate":
+            undo = self.cursor
+            if self.cursor != self.tail:
+                self.cursor = self.nxt[self.cursor]
+            else:
+                # Recycle: every card left goes back to the stock in draw order
+                self.cursor = self.nxt[self.head]
+        else:
+            undo = [self._remove(self.cards[n]) for n in move[1:]]
+        self.history.append((move, undo))
+
+    def undo(self):
+        """Takes back the last applied move and returns it (None if there is none)."""
+        if not self.history: return None
+        move, undo = self.history.pop()
+        if move[0] == "rotate":
+            self.cursor = undo
+        else:
+            for loc in reversed(undo):
+                self._restore(loc)
+        return move
+
+    def _remove(self, card):
+        self.foundation.append(card)
+        i = self.slot_of.get(card.number)
+        if i is not None:
+            self.pyramid[i] = "**"
+            for p in PYRAMID_UNCOVERS[i]: self.covered[p] -= 1
+            return ("pyramid", i)
+        j = self.pos_of[card.number]
+        self.nxt[self.prv[j]] = self.nxt[j]
+        self.prv[self.nxt[j]] = self.prv[j]
+        self.gone[j] = True
+        return ("pile", j)
+
+    def _restore(self, loc):
+        card = self.foundation.pop()
+        kind, k = loc
+        if kind == "pyramid":
+            self.pyramid[k] = card
+            for p in PYRAMID_UNCOVERS[k]: self.covered[p] += 1
+        else:
+            self.nxt[self.prv[k]] = k
+            self.prv[self.nxt[k]] = k
+            self.gone[k] = False
@@ -0,0 +1,108 @@
+# heuristics.py
+# Pluggable A* estimates over packed engine states.
+#
+# A heuristic is bound to a Layout once per search. The solver asks for
+# the root value with `initial` and for every child with `update`, passing
+# the parent's value along, so cheap estimates can be adjusted in O(1)
+# and pricier ones only pay for pyramids they have not seen yet.
+import engine
+
+PYRAMID_ALL = engine.PYRAMID_ALL
+
+# Cost of one card still in slot i: half a move, plus a penalty for the
+# higher (harder to reach) rows. Row 0 is top, row 6 is bottom.
+SLOT_COST = [0.5 + (7 - engine.SLOT_ROW[i]) * 0.1 for i in range(engine.PYRAMID_SIZE)]
+
+CACHE_LIMIT = 1 << 20
+
+
+class Heuristic:
+    """
+    Base class. Subclasses implement `evaluate(pyr)` and may override
+    `update` with an incremental rule. Estimates depend only on the pyramid
+    mask, so rotate moves reuse the parent value and full evaluations are
+    memoized per pyramid mask.
+    """
+    name = "base"
+
+    def __init__(self):
+        self.layout = None
+        self.cache = {}
+
+    def bind(self, layout):
+        self.layout = layout
+        self.cache.clear()
+        return self
+
+    def evaluate(self, pyr):
+        raise NotImplementedError
+
+    def estimate(self, pyr):
+        h = self.cache.get(pyr)
+        if h is None:
+            if len(self.cache) >= CACHE_LIMIT: self.cache.clear()
+            h = self.cache[pyr] = self.evaluate(pyr)
+        return h
+
+    def initial(self, state):
+        return self.estimate(state & PYRAMID_ALL)
+
+    def update(self, h, parent, child):
+        """Estimate for `child` given the parent's value `h`."""
+        pyr = child & PYRAMID_ALL
+        if pyr == parent & PYRAMID_ALL: return h
+        return self.estimate(pyr)
+
+
+class RowPenaltyHeuristic(Heuristic):
+    """
+    The original A* estimate: cards / 2 plus 0.1 per card per row above
+    the bottom. Each card contributes a fixed amount, so a child is the
+    parent minus the cost of the cards its move removed.
+    """
+    name = "rows"
+
+    def evaluate(self, pyr):
+        h = 0.0
+        for i in engine.iter_bits(pyr):
+            h += SLOT_COST[i]
+        return h
+
+    def update(self, h, parent, child):
+        gone = (parent ^ child) & PYRAMID_ALL
+        while gone:
+            low = gone & -gone
+            h -= SLOT_COST[low.bit_length() - 1]
+            gone ^= low
+        return h
+
+
+class ComplementHeuristic(Heuristic):
+    """
+    Counts moves that are still unavoidable: every king needs its own move
+    and every move removes at most one pyramid card of each rank in a
+    complement pair (r, 13 - r), so the larger side of each pair must be
+    matched one move at a time. Stronger than cards / 2, but needs a rank
+    census per pyramid, hence the memo.
+    """
+    name = "complement"
+
+    def evaluate(self, pyr):
+        counts = [bin(pyr & m).count("1") for m in self.layout.rank_slots]
+        h = counts[13]
+        for r in range(1, 7):
+            h += max(counts[r], counts[13 - r])
+        return float(h)
+
+
+HEURISTICS = {cls.name: cls for cls in (RowPenaltyHeuristic, ComplementHeuristic)}
+
+
+def get_heuristic(name_or_obj=None):
+    """Returns a fresh Heuristic for a registered name (default "rows"), or the object itself."""
+    if name_or_obj is None: return RowPenaltyHeuristic()
+    if isinstance(name_or_obj, Heuristic): return name_or_obj
+    try:
+        return HEURISTICS[name_or_obj]()
+    except KeyError:
+        raise ValueError(f"Unknown heuristic: {name_or_obj}")
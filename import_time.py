@@ -0,0 +1,37 @@
+# import_time.py
+# Measures cold-start import cost of the core modules, each in a fresh
+# interpreter, and checks that none of them pulls in tkinter.
+#
+#   python import_time.py [module ...]
+import subprocess
+import sys
+
+CORE_MODULES = ["models", "game_logic", "engine", "solvers", "benchmark"]
+
+PROBE = (
+    "import sys, time\n"
+    "t0 = time.perf_counter()\n"
+    "import {module}\n"
+    "t1 = time.perf_counter()\n"
+    "print((t1 - t0) * 1000.0, 'tkinter' in sys.modules)\n"
+)
+
+def measure(module, python=sys.executable):
+    """Returns (milliseconds, imported_tkinter) for a cold import of `module`."""
+    out = subprocess.run([python, "-c", PROBE.format(module=module)],
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), out[1] == "True"
+
+def main(argv=None):
+    modules = (argv if argv is not None else sys.argv[1:]) or CORE_MODULES
+    failed = False
+    print(f"{'MODULE':<15} | {'IMPORT (ms)':>11} | TK")
+    print("-" * 36)
+    for module in modules:
+        ms, has_tk = measure(module)
+        failed |= has_tk
+        print(f"{module:<15} | {ms:>11.2f} | {'YES' if has_tk else 'no'}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
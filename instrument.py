@@ -0,0 +1,122 @@
+# instrument.py
+# Optional search instrumentation for the solvers.
+#
+# Pass a SearchTrace as `trace=` to solve_dfs / solve_astar (or the
+# find_solution_* wrappers) to count what the search did and where its
+# time went. Without one the solvers run their normal code path: the only
+# extra work is a `trace is not None` test per expanded node.
+#
+# A `hook` callable receives per-node events:
+#   hook("expand", depth, state, children)   - a node was expanded
+#   hook("duplicate", depth, state)          - a child was already known
+#   hook("stale", depth, state)              - A* popped an outdated entry
+import time
+
+# Time buckets filled by the timed() wrappers
+TIMERS = ("movegen", "heuristic", "hashing")
+
+class SearchTrace:
+    """
+    Counters and timers for one search. `timing` wraps move generation,
+    heuristic updates and hashing / table probes in perf_counter calls;
+    it costs more than the counters, so it can be switched off.
+    """
+
+    def __init__(self, hook=None, timing=True):
+        self.hook = hook
+        self.timing = timing
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.stale = 0
+        self.max_depth = 0
+        self.max_frontier = 0
+        self.per_depth = {}   # depth -> [expanded, generated]
+        self.times = dict.fromkeys(TIMERS, 0.0)
+        self.total_time = 0.0
+        self._t0 = None
+
+    # --- Called by the solvers ---
+    def begin(self):
+        self._t0 = time.perf_counter()
+
+    def end(self):
+        if self._t0 is not None:
+            self.total_time += time.perf_counter() - self._t0
+            self._t0 = None
+
+    def expand(self, depth, frontier, state, children):
+        n = len(children)
+        self.expanded += 1
+        self.generated += n
+        if depth > self.max_depth: self.max_depth = depth
+        if frontier > self.max_frontier: self.max_frontier = frontier
+        row = self.per_depth.get(depth)
+        if row is None:
+            self.per_depth[depth] = [1, n]
+        else:
+            row[0] += 1
+            row[1] += n
+        if self.hook is not None: self.hook("expand", depth, state, children)
+
+    def duplicate(self, depth, state):
+        self.duplicates += 1
+        if self.hook is not None: self.hook("duplicate", depth, state)
+
+    def stale_pop(self, depth, state):
+        self.stale += 1
+        if self.hook is not None: self.hook("stale", depth, state)
+
+    def timed(self, bucket, fn):
+        """`fn` wrapped to add its run time to `bucket`, or `fn` itself with timing off."""
+        if not self.timing: return fn
+        times = self.times
+        clock = time.perf_counter
+
+        def wrapper(*args):
+            t0 = clock()
+            try:
+                return fn(*args)
+            finally:
+                times[bucket] += clock() - t0
+        return wrapper
+
+    # --- Results ---
+    def branching(self):
+        """Average children per expanded node, by depth."""
+        return {d: gen / exp for d, (exp, gen) in sorted(self.per_depth.items())}
+
+    def as_dict(self):
+        """Plain (JSON/pickle friendly) summary."""
+        measured = sum(self.times.values())
+        return {
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "duplicates": self.duplicates,
+            "stale": self.stale,
+            "max_depth": self.max_depth,
+            "max_frontier": self.max_frontier,
+            "branching": self.generated / self.expanded if self.expanded else 0.0,
+            "branching_by_depth": {str(d): round(b, 3) for d, b in self.branching().items()},
+            "time": dict(self.times, total=self.total_time,
+                         other=max(self.total_time - measured, 0.0) if self.timing else None),
+        }
+
+def format_trace(stats, indent="", by_depth=True):
+    """Human-readable lines for an as_dict() summary (export files, reports)."""
+    t = stats["time"]
+    lines = [
+        f"Nodes Expanded: {stats['expanded']:,}",
+        f"Nodes Generated: {stats['generated']:,}",
+        f"Duplicate Hits: {stats['duplicates']:,}" + (f" (+{stats['stale']:,} stale)" if stats["stale"] else ""),
+        f"Max Depth: {stats['max_depth']}",
+        f"Max Frontier: {stats['max_frontier']:,}",
+        f"Avg Branching: {stats['branching']:.2f}",
+    ]
+    if t["other"] is not None and t["total"]:
+        split = ", ".join(f"{k} {t[k] / t['total'] * 100:.0f}%" for k in TIMERS + ("other",))
+        lines.append(f"Time: {t['total']:.4f} s ({split})")
+    if by_depth and stats["branching_by_depth"]:
+        lines.append("Branching by Depth: " + ", ".join(f"{d}:{b:.1f}"
+                                                        for d, b in stats["branching_by_depth"].items()))
+    return "".join(f"{indent}{line}\n" for line in lines)
@@ -3,20 +3,32 @@ import tkinter as tk
 from tkinter import messagebox, scrolledtext, filedialog
 import os
 import datetime
+import multiprocessing
 
 import settings
 import models
 import game_logic as gl
-import solvers
 import benchmark
-
-# Image Library Check
-HAS_PIL = False
-try:
-    from PIL import Image, ImageTk
-    HAS_PIL = True
-except ImportError:
-    pass
+import solution_cache
+import search_worker
+import portfolio
+import card_atlas
+import board_view
+from instrument import format_trace
+
+# Image Library Check (card images need Pillow; without it cards are drawn)
+HAS_PIL = card_atlas.HAS_PIL
+
+BENCHMARK_POLL_MS = 100
+SEARCH_POLL_MS = 50
+
+# Solver button -> node limit (search functions live in solvers.ALGORITHMS)
+AI_NODE_LIMITS = {
+    "DFS": settings.DFS_MAX_NODES,
+    "A*": settings.ASTAR_MAX_NODES,
+    "IDA*": settings.IDASTAR_MAX_NODES,
+    portfolio.NAME: settings.PORTFOLIO_MAX_NODES,
+}
 
 # --- Solution Guide Window ---
 class StepsWindow(tk.Toplevel):
@@ -49,7 +61,7 @@ class BenchmarkWindow(tk.Toplevel):
     def __init__(self, parent):
         super().__init__(parent)
         self.title("Algorithm Benchmark")
-        self.geometry("600x500")
+        self.geometry("880x500")
         self.configure(bg="#1a452a")
         
         frame_top = tk.Frame(self, bg="#1a452a")
@@ -65,78 +77,106 @@ class BenchmarkWindow(tk.Toplevel):
         self.ent_limit.insert(0, "100000") 
         self.ent_limit.grid(row=0, column=3, padx=5)
 
+        tk.Label(frame_top, text="Workers:", bg="#1a452a", fg="white").grid(row=0, column=4, padx=5, sticky="e")
+        self.ent_workers = tk.Entry(frame_top, width=4)
+        self.ent_workers.insert(0, str(os.cpu_count() or 1))
+        self.ent_workers.grid(row=0, column=5, padx=5)
+
+        self.var_cache = tk.BooleanVar(value=True)
+        tk.Checkbutton(frame_top, text="Use cache", variable=self.var_cache, bg="#1a452a", fg="white",
+                       selectcolor="#1a452a", activebackground="#1a452a").grid(row=0, column=6, padx=5)
+
+        self.var_portfolio = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame_top, text="Portfolio", variable=self.var_portfolio, bg="#1a452a", fg="white",
+                       selectcolor="#1a452a", activebackground="#1a452a").grid(row=0, column=7, padx=5)
+
+        self.var_instrument = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame_top, text="Search stats", variable=self.var_instrument, bg="#1a452a", fg="white",
+                       selectcolor="#1a452a", activebackground="#1a452a").grid(row=0, column=8, padx=5)
+
         self.btn_run = tk.Button(frame_top, text="Start Benchmark", command=self.start_benchmark, 
                                  bg="#f0d060", fg="black", font=("Arial", 10, "bold"))
-        self.btn_run.grid(row=0, column=4, padx=15)
+        self.btn_run.grid(row=0, column=9, padx=15)
+
+        self.stream = None
 
         self.txt_output = scrolledtext.ScrolledText(self, bg="#111", fg="#ddd", font=("Consolas", 9))
         self.txt_output.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
 
     def log(self, text):
-        def _write():
-            self.txt_output.insert(tk.END, text)
-            self.txt_output.see(tk.END)
-        self.after(0, _write)
+        self.txt_output.insert(tk.END, text)
+        self.txt_output.see(tk.END)
 
     def on_finish(self):
-        self.after(0, lambda: self.btn_run.config(state=tk.NORMAL, text="Start Benchmark"))
+        self.btn_run.config(state=tk.NORMAL, text="Start Benchmark")
 
     def start_benchmark(self):
         try:
             runs = int(self.ent_runs.get())
             limit = int(self.ent_limit.get())
+            workers = int(self.ent_workers.get())
         except ValueError:
             messagebox.showerror("Error", "Please enter valid integers.")
             return
 
         self.txt_output.delete("1.0", tk.END)
         self.btn_run.config(state=tk.DISABLED, text="Running...")
-        benchmark.run_benchmark_gui(runs, limit, self.log, self.on_finish)
+        self.stream = benchmark.BenchmarkStream(runs, limit, workers, self.var_cache.get(),
+                                                self.var_portfolio.get(), self.var_instrument.get()).start()
+        self.log(benchmark.format_header(runs, limit, self.stream.workers))
+        self.after(BENCHMARK_POLL_MS, self.poll_benchmark)
+
+    def poll_benchmark(self):
+        # Results stream in from the worker pool in completion order
+        stream = self.stream
+        for record in stream.drain():
+            self.log(benchmark.format_game(record, len(stream.records), stream.num_runs))
+
+        if not stream.done():
+            self.after(BENCHMARK_POLL_MS, self.poll_benchmark)
+            return
+
+        if stream.error:
+            self.log(f"\nERROR: {stream.error}\n")
+        else:
+            results = benchmark.summarize(stream.records, stream.num_runs)
+            self.log(benchmark.format_report(results, stream.num_runs))
+            self.log("DONE.")
+        self.on_finish()
 
 class SolitaireApp(tk.Tk):
     def __init__(self):
+        settings.enable_high_dpi()
         super().__init__()
+        # Screen-dependent constants are measured on the app's own window
+        settings.init_screen(self)
         self.title("Pyramid Solitaire - Modular AI")
         self.geometry(f"{settings.SCREEN_W}x{settings.SCREEN_H}")
         self.resizable(False, False)
         self.configure(bg="#225a37")
 
         self.deck = []
-        self.pyramid = []
-        self.stock = []
-        self.waste = []
-        self.foundation = []
+        self.game = gl.GameState([], [], ["**"])
         self.selected = []
         
         self.ai_moves = None
         self.ai_running = False
         self.last_algo_used = ""
         
-        self.image_cache = {}
-        self.back_image = None
+        self.atlas = None
         self.load_assets()
 
+        self.solution_cache = solution_cache.open_cache()
+        self.search = None
+        self.search_key = None
+
         self._init_gui()
         self.start_new_game()
 
     def load_assets(self):
-        self.image_cache = {}
+        # Card images come from the pre-scaled atlas on first draw (see card_atlas.py)
         if not HAS_PIL: return
-
-        for i in range(1, 53):
-            path = os.path.join(settings.ASSET_DIR, f"{i}.JPG")
-            if os.path.exists(path):
-                try:
-                    img = Image.open(path).resize((settings.CARD_W, settings.CARD_H), Image.LANCZOS)
-                    self.image_cache[i] = ImageTk.PhotoImage(img)
-                except: pass
-        
-        back_path = os.path.join(settings.ASSET_DIR, "Back.JPG")
-        if os.path.exists(back_path):
-            try:
-                img = Image.open(back_path).resize((settings.CARD_W, settings.CARD_H), Image.LANCZOS)
-                self.back_image = ImageTk.PhotoImage(img)
-            except: pass
+        self.atlas = card_atlas.CardAtlas(settings.ASSET_DIR, settings.CARD_W, settings.CARD_H)
 
     def _init_gui(self):
         self.sidebar = tk.Frame(self, bg="#1a452a", width=240)
@@ -149,6 +189,7 @@ class SolitaireApp(tk.Tk):
         btn_opts = {"font":("Arial", 11), "bg":"#e0e0e0", "fg":"#111", "bd":0, "cursor":"hand2"}
         tk.Button(self.sidebar, text="New Game", command=self.start_new_game, **btn_opts).pack(fill=tk.X, padx=20, pady=5, ipady=3)
         tk.Button(self.sidebar, text="Rotate Stock", command=self.user_rotate, **btn_opts).pack(fill=tk.X, padx=20, pady=5, ipady=3)
+        tk.Button(self.sidebar, text="Undo", command=self.user_undo, **btn_opts).pack(fill=tk.X, padx=20, pady=5, ipady=3)
         
         tk.Frame(self.sidebar, height=2, bg="#557766").pack(fill=tk.X, padx=10, pady=15)
         
@@ -157,6 +198,13 @@ class SolitaireApp(tk.Tk):
                   font=("Arial", 10), bg="#f0d060", fg="#222", bd=0, cursor="hand2").pack(fill=tk.X, padx=20, pady=5, ipady=5)
         tk.Button(self.sidebar, text="Solve (A*)", command=lambda: self.start_ai_search("A*"), 
                   font=("Arial", 10, "bold"), bg="#40a0ff", fg="white", bd=0, cursor="hand2").pack(fill=tk.X, padx=20, pady=5, ipady=5)
+        tk.Button(self.sidebar, text="Solve (IDA*)", command=lambda: self.start_ai_search("IDA*"),
+                  font=("Arial", 10, "bold"), bg="#30b090", fg="white", bd=0, cursor="hand2").pack(fill=tk.X, padx=20, pady=5, ipady=5)
+        tk.Button(self.sidebar, text="Solve (Portfolio)", command=lambda: self.start_ai_search(portfolio.NAME),
+                  font=("Arial", 10, "bold"), bg="#a070e0", fg="white", bd=0, cursor="hand2").pack(fill=tk.X, padx=20, pady=5, ipady=5)
+        self.btn_cancel = tk.Button(self.sidebar, text="✖ Cancel Search", command=self.cancel_ai_search,
+                                    font=("Arial", 10), bg="#557766", fg="#ddd", bd=0, cursor="hand2", state=tk.DISABLED)
+        self.btn_cancel.pack(fill=tk.X, padx=20, pady=5, ipady=5)
 
         self.btn_show_steps = tk.Button(self.sidebar, text="📖 Show Steps", command=self.open_steps_window, 
                                     font=("Arial", 10), bg="#557766", fg="#ddd", bd=0, cursor="hand2", state=tk.DISABLED)
@@ -176,6 +224,8 @@ class SolitaireApp(tk.Tk):
         self.canvas = tk.Canvas(self, bg="#225a37", highlightthickness=0)
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<Configure>", self.on_canvas_resize)
+        self.board = board_view.BoardView(self.canvas, self.atlas)
 
     def open_benchmark(self):
         BenchmarkWindow(self)
@@ -185,15 +235,14 @@ class SolitaireApp(tk.Tk):
         StepsWindow(self, self.ai_moves)
 
     def start_new_game(self):
+        self.cancel_ai_search()
         self.deck = models.create_deck()
-        self.pyramid = self.deck[:28]
-        self.stock = self.deck[28:]
-        self.waste = ["**"]
-        self.foundation = []
+        self.game = gl.GameState(self.deck[:28], self.deck[28:], ["**"])
         self.selected = []
         self.ai_moves = None
         self.ai_running = False
         self.last_algo_used = ""
+        self.last_search_stats = None
         
         self.btn_export.config(state=tk.DISABLED, bg="#557766")
         self.btn_show_steps.config(state=tk.DISABLED, bg="#557766")
@@ -201,119 +250,73 @@ class SolitaireApp(tk.Tk):
         self.refresh_canvas()
 
     def refresh_canvas(self):
-        self.canvas.delete("all")
-        
-        y = settings.TOP_OFFSET
-        idx = 0
-        for row in range(1, 8):
-            row_width = row * settings.CARD_W + (row - 1) * settings.PADDING_X
-            start_x = (self.canvas.winfo_width() - row_width) // 2
-            if start_x < 0: start_x = (settings.SCREEN_W - 240 - row_width) // 2
-
-            for col in range(row):
-                if idx < len(self.pyramid):
-                    c = self.pyramid[idx]
-                    x = start_x + col * (settings.CARD_W + settings.PADDING_X)
-                    self.draw_card_at(c, x, y, f"pyramid_{idx}")
-                idx += 1
-            y += settings.CARD_H + settings.PADDING_Y
-
-        if len(self.stock) > 0 and self.stock[0] != "**":
-            self.draw_card_at("back", settings.SIDE_OFFSET, settings.TOP_OFFSET, "stock")
-            self.canvas.create_text(settings.SIDE_OFFSET + settings.CARD_W/2, settings.TOP_OFFSET - 15, text=f"Stock ({len(self.stock)})", fill="#ccc")
-        else:
-            self.draw_placeholder(settings.SIDE_OFFSET, settings.TOP_OFFSET, "stock")
-            self.canvas.create_text(settings.SIDE_OFFSET + settings.CARD_W/2, settings.TOP_OFFSET - 15, text="Empty", fill="#ccc")
+        # Only slots whose card, selection or visibility changed are touched
+        self.board.render(self.pyramid, self.stock, self.waste, self.selected)
 
-        if "stock_pile" in self.selected:
-            x, y = settings.SIDE_OFFSET, settings.TOP_OFFSET
-            self.canvas.create_rectangle(x-3, y-3, x+settings.CARD_W+3, y+settings.CARD_H+3, 
-                                         outline="yellow", width=3, tags=("highlight",))
+    # Views of the current position (see gl.GameState)
+    @property
+    def pyramid(self):
+        return self.game.pyramid
 
-        waste_x = settings.SIDE_OFFSET + settings.CARD_W + 30
-        if len(self.waste) > 0 and isinstance(self.waste[0], models.Card):
-            self.draw_card_at(self.waste[0], waste_x, settings.TOP_OFFSET, "waste")
-        else:
-            self.draw_placeholder(waste_x, settings.TOP_OFFSET, "waste")
-
-    def draw_card_at(self, card, x, y, tag):
-        if card == "**": return 
-        
-        is_sel = (card in self.selected)
-        
-        if card == "back":
-            if self.back_image:
-                self.canvas.create_image(x, y, image=self.back_image, anchor="nw", tags=(tag,))
-            else:
-                self.canvas.create_rectangle(x, y, x+settings.CARD_W, y+settings.CARD_H, fill="#406080", outline="white", tags=(tag,))
-            return
+    @property
+    def stock(self):
+        return self.game.stock
 
-        img = self.image_cache.get(card.number) if HAS_PIL else None
-        
-        if is_sel:
-            self.canvas.create_rectangle(x-3, y-3, x+settings.CARD_W+3, y+settings.CARD_H+3, fill="yellow", outline="")
+    @property
+    def waste(self):
+        return self.game.waste
 
-        if img:
-            self.canvas.create_image(x, y, image=img, anchor="nw", tags=(tag,))
-        else:
-            self.canvas.create_rectangle(x, y, x+settings.CARD_W, y+settings.CARD_H, fill="white", outline="#111", tags=(tag,))
-            color = card.get_color()
-            self.canvas.create_text(x+10, y+15, text=card.get_display_rank(), fill=color, font=("Arial", 12, "bold"))
-            self.canvas.create_text(x+settings.CARD_W/2, y+settings.CARD_H/2, text=card.get_suit_symbol(), fill=color, font=("Arial", 28))
+    @property
+    def foundation(self):
+        return self.game.foundation
 
-    def draw_placeholder(self, x, y, tag):
-        self.canvas.create_rectangle(x, y, x+settings.CARD_W, y+settings.CARD_H, outline="#3a6f50", width=2, tags=(tag,))
+    def on_canvas_resize(self, event):
+        self.board.relayout()
 
     def user_rotate(self):
-        if self.ai_running: return
-        self.stock, self.waste = gl.stock_rotate(self.stock, self.waste)
+        if self.ai_running or self.search: return
+        self.game.apply(("rotate",))
+        self.selected.clear()
         self.lbl_status.config(text="Stock Rotated")
         self.refresh_canvas()
 
+    def user_undo(self):
+        if self.ai_running or self.search: return
+        move = self.game.undo()
+        self.selected.clear()
+        self.lbl_status.config(text=f"Undone: {gl.get_move_string(move)}" if move else "Nothing to undo", fg="white")
+        self.refresh_canvas()
+
     def on_click(self, event):
-        if self.ai_running: return
+        if self.ai_running or self.search: return
+
+        target = self.board.layout.hit(event.x, event.y)
 
-        x, y = event.x, event.y
-        
         # Stock (Rotate)
-        if settings.SIDE_OFFSET <= x <= settings.SIDE_OFFSET+settings.CARD_W and settings.TOP_OFFSET <= y <= settings.TOP_OFFSET+settings.CARD_H:
+        if target == board_view.STOCK:
             self.user_rotate()
             return
 
         # Waste
-        w_x = settings.SIDE_OFFSET + settings.CARD_W + 30
-        if w_x <= x <= w_x+settings.CARD_W and settings.TOP_OFFSET <= y <= settings.TOP_OFFSET+settings.CARD_H:
-            if len(self.waste) > 0 and isinstance(self.waste[0], models.Card):
-                self.handle_card_select(self.waste[0])
+        if target == board_view.WASTE:
+            top = self.game.waste_top()
+            if top is not None:
+                self.handle_card_select(top)
             return
 
         # Pyramid
-        card = self.get_pyramid_card_at(x, y)
+        card = self.get_pyramid_card_at(event.x, event.y)
         if card:
-            acc = gl.get_accessible_cards(self.pyramid, self.stock, self.waste)
-            if card in acc:
+            if self.game.is_accessible(card):
                 self.handle_card_select(card)
             else:
                 self.lbl_status.config(text="Card Blocked", fg="#ffaaaa")
 
     def get_pyramid_card_at(self, mx, my):
-        y = settings.TOP_OFFSET
-        idx = 0
-        for row in range(1, 8):
-            row_width = row * settings.CARD_W + (row - 1) * settings.PADDING_X
-            start_x = (self.canvas.winfo_width() - row_width) // 2
-            if start_x < 0: start_x = (settings.SCREEN_W - 240 - row_width) // 2
-
-            for col in range(row):
-                if idx < len(self.pyramid):
-                    c = self.pyramid[idx]
-                    if c != "**":
-                        cx = start_x + col * (settings.CARD_W + settings.PADDING_X)
-                        if cx <= mx <= cx+settings.CARD_W and y <= my <= y+settings.CARD_H:
-                            return c
-                idx += 1
-            y += settings.CARD_H + settings.PADDING_Y
-        return None
+        idx = self.board.layout.hit(mx, my)
+        if not isinstance(idx, int) or idx >= len(self.pyramid): return None
+        c = self.pyramid[idx]
+        return c if c != "**" else None
 
     def handle_card_select(self, card):
         # Toggle Selection
@@ -325,9 +328,7 @@ class SolitaireApp(tk.Tk):
             
             # 1. King (Single Remove)
             if gl.is_king(card):
-                self.pyramid, self.stock, self.waste, self.foundation = gl.removeCards_obj(
-                    card, "none", self.pyramid, self.stock, self.waste, self.foundation
-                )
+                self.game.apply(("king", card.number))
                 self.selected.clear()
                 self.lbl_status.config(text=f"Removed King {card.name()}")
             
@@ -336,34 +337,97 @@ class SolitaireApp(tk.Tk):
                 a, b = self.selected
                 
                 # --- NEW VALIDATION CHECK ---
-                if not gl.is_valid_source_pair(a, b, self.pyramid):
+                if not (self.game.in_pyramid(a) or self.game.in_pyramid(b)):
                     self.lbl_status.config(text="Invalid: Stock & Waste cannot match!", fg="#ff4444")
                     self.selected.clear()
                 else:
-                    if a.rank + b.rank == 13:
-                        self.pyramid, self.stock, self.waste, self.foundation = gl.removeCards_obj(
-                            a, b, self.pyramid, self.stock, self.waste, self.foundation
-                        )
-                        self.lbl_status.config(text=f"Matched {a.name()} & {b.name()}")
-                    else:
+                    move = ("pair", a.number, b.number)
+                    if a.rank + b.rank != 13:
                         self.lbl_status.config(text="Sum is not 13", fg="#ffaaaa")
+                    elif not self.game.is_legal(move):
+                        self.lbl_status.config(text="Card Blocked", fg="#ffaaaa")
+                    else:
+                        self.game.apply(move)
+                        self.lbl_status.config(text=f"Matched {a.name()} & {b.name()}")
                     self.selected.clear()
         
         self.refresh_canvas()
 
     def start_ai_search(self, algo_type):
-        if self.ai_running: return
+        if self.ai_running or self.search: return
+        max_nodes = AI_NODE_LIMITS[algo_type]
+
+        # Solvers, cache and replay all start from the GameState's position
+        position = self.game.lists()
+
+        # Repeat positions come straight from the on-disk solution cache
+        key = solution_cache.position_key(*position)
+        if self.solution_cache is not None:
+            hit = self.solution_cache.lookup(key, algo_type, max_nodes)
+            if hit is not None:
+                sol = hit["moves"] if hit["verdict"] == "solved" else None
+                self.last_search_stats = None
+                self.show_search_result(algo_type, sol, hit["verdict"], " (cached)")
+                return
+
+        # Search in child processes; poll_ai_search picks up progress and the result
+        if algo_type == portfolio.NAME:
+            self.search = portfolio.PortfolioSearch(*position, max_nodes).start()
+        else:
+            self.search = search_worker.SearchProcess(algo_type, *position, max_nodes,
+                                                      timing=settings.TRACE_GUI_SEARCHES).start()
+        self.search_key = key
+        self.btn_cancel.config(state=tk.NORMAL, bg="#ff6060", fg="white")
         self.lbl_status.config(text=f"{algo_type} Searching...", fg="#ffff00")
-        self.update()
+        self.after(SEARCH_POLL_MS, self.poll_ai_search)
 
-        sol = None
-        if algo_type == "DFS":
-            sol = solvers.find_solution_dfs(self.pyramid, self.stock, self.waste, self.foundation)
-        elif algo_type == "A*":
-            sol = solvers.find_solution_astar(self.pyramid, self.stock, self.waste, self.foundation)
-        
+    def poll_ai_search(self):
+        search = self.search
+        if search is None or search.cancelled: return
+
+        info = search.poll()
+        if info:
+            self.lbl_status.config(
+                text=f"{search.algorithm} Searching...\n{info['nodes']:,} nodes | frontier {info['frontier']:,} | "
+                     f"{info['elapsed']:.1f} s", fg="#ffff00")
+
+        if not search.finished():
+            self.after(SEARCH_POLL_MS, self.poll_ai_search)
+            return
+
+        self.end_search()
+        if search.error:
+            messagebox.showerror("AI", f"{search.algorithm} search failed:\n{search.error}")
+            self.lbl_status.config(text="Search Failed", fg="#ffaaaa")
+            return
+
+        res = search.result
+        verdict = res.get("verdict") or solution_cache.verdict_for(res["moves"], res["nodes"], search.max_nodes)
+        # As in solve_cached(): a timed-out search is never stored
+        if self.solution_cache is not None and verdict != "timeout":
+            self.solution_cache.store(self.search_key, search.algorithm, res["moves"], res["nodes"],
+                                      search.max_nodes, verdict)
+        self.last_search_stats = res.get("trace")
+        source = f" (won by {res['winner']})" if res.get("winner") else ""
+        self.show_search_result(search.algorithm, res["moves"], verdict, source)
+
+    def cancel_ai_search(self):
+        if not self.search: return
+        self.search.cancel()
+        self.end_search()
+        self.lbl_status.config(text="Search Cancelled", fg="#ffaaaa")
+
+    def end_search(self):
+        self.search = None
+        self.search_key = None
+        self.btn_cancel.config(state=tk.DISABLED, bg="#557766", fg="#ddd")
+
+    def show_search_result(self, algo_type, sol, verdict, source):
         if not sol:
-            messagebox.showinfo("AI", f"No solution found via {algo_type}.")
+            if verdict == "unsolvable":
+                messagebox.showinfo("AI", f"{algo_type} proved this position has no solution{source}.")
+            else:
+                messagebox.showinfo("AI", f"No solution found via {algo_type}{source}.")
             self.lbl_status.config(text="No Solution", fg="#ffaaaa")
         else:
             self.ai_moves = sol
@@ -374,7 +438,7 @@ class SolitaireApp(tk.Tk):
 
             ans = messagebox.askyesno(
                 "AI Success", 
-                f"{algo_type} found solution in {len(sol)} moves.\n\n"
+                f"{algo_type} found solution in {len(sol)} moves{source}.\n\n"
                 "• Click YES to watch the AI play it.\n"
                 "• Click NO to play it yourself (Use 'Show Steps')."
             )
@@ -406,6 +470,10 @@ class SolitaireApp(tk.Tk):
                 for i, move in enumerate(self.ai_moves):
                     txt = gl.get_move_string(move)
                     f.write(f"Step {i+1}: {txt}\n")
+                if self.last_search_stats:
+                    f.write("\n" + "-" * 40 + "\n")
+                    f.write("Search Statistics\n")
+                    f.write(format_trace(self.last_search_stats))
                 f.write("\n" + "-" * 40 + "\n")
                 f.write("End of Solution\n")
             messagebox.showinfo("Export", f"Successfully saved to:\n{filename}")
@@ -444,23 +512,8 @@ class SolitaireApp(tk.Tk):
     def finalize_ai_step(self, index, move):
         if not self.ai_running: return
         
-        m_type = move[0]
-        
-        if m_type == "rotate":
-            self.stock, self.waste = gl.stock_rotate(self.stock, self.waste)
-        elif m_type == "king":
-            c = self.find_card(move[1])
-            if c:
-                self.pyramid, self.stock, self.waste, self.foundation = gl.removeCards_obj(
-                    c, "none", self.pyramid, self.stock, self.waste, self.foundation
-                )
-        elif m_type == "pair":
-            c1 = self.find_card(move[1])
-            c2 = self.find_card(move[2])
-            if c1 and c2:
-                self.pyramid, self.stock, self.waste, self.foundation = gl.removeCards_obj(
-                    c1, c2, self.pyramid, self.stock, self.waste, self.foundation
-                )
+        if self.game.is_legal(move):
+            self.game.apply(move)
 
         self.selected = []
         self.refresh_canvas()
@@ -468,12 +521,10 @@ class SolitaireApp(tk.Tk):
         self.after(delay, lambda: self.execute_ai_step(index+1))
 
     def find_card(self, num):
-        all_cards = self.pyramid + self.stock + self.waste
-        for x in all_cards:
-            if isinstance(x, models.Card) and x.number == num:
-                return x
-        return None
+        return self.game.find(num)
 
 if __name__ == "__main__":
+    # Benchmark workers re-import this module in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     app = SolitaireApp()
     app.mainloop()
\ No newline at end of file
@@ -31,7 +31,10 @@ class Card:
     def __repr__(self):
         return f"<{self.name()}>"
 
-def create_deck():
+def create_deck(seed=None):
+    # With a seed the order matches random.seed(seed) + random.shuffle,
+    # without touching the global generator
     deck = [Card(i) for i in range(1, 53)]
-    random.shuffle(deck)
+    rng = random if seed is None else random.Random(seed)
+    rng.shuffle(deck)
     return deck
\ No newline at end of file
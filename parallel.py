@@ -0,0 +1,218 @@
+# parallel.py
+# Work-splitting parallel DFS, so one hard deal can use every core.
+#
+# The root's children (its king, pair and rotate subtrees) become jobs on
+# a shared queue. Each worker process runs the same iterative DFS as
+# solvers.solve_dfs on the jobs it takes. Whenever another worker is idle,
+# a busy worker donates the untried children of the shallowest frame on
+# its stack as new jobs, so the work is split again as it runs. All workers
+# check and record visited states in one SharedTranspositionTable, so no
+# subtree is searched twice.
+#
+# The node budget counts the nodes of all workers together. The search is
+# proven unsolvable once every job has finished without a solution.
+import os
+import queue
+import time
+import multiprocessing
+
+import config
+import engine
+import solvers
+from transposition import SharedTranspositionTable, zobrist_hash, zobrist_update
+
+NAME = "Parallel"
+
+# Seconds between the parent's checks of the node budget, deadline and progress
+POLL_INTERVAL = 0.02
+
+# --- Worker side ---
+def _worker(layout, reduce, table, jobs, results, shared, max_nodes):
+    # Leftover donated jobs must not keep this process alive at exit
+    jobs.cancel_join_thread()
+    expand = solvers.expansion(layout, reduce)
+    waiting = False
+    try:
+        while not shared["stop"].value:
+            try:
+                job = jobs.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if not waiting:
+                    waiting = True
+                    with shared["idle"].get_lock(): shared["idle"].value += 1
+                continue
+            if waiting:
+                waiting = False
+                with shared["idle"].get_lock(): shared["idle"].value -= 1
+
+            moves = _run_job(job, expand, table, jobs, results, shared, max_nodes)
+            if moves is not None:
+                # Flag first: the parent must not see pending == 0 without it
+                shared["found"].value = 1
+                shared["stop"].value = 1
+                results.put(("solved", moves))
+            with shared["pending"].get_lock(): shared["pending"].value -= 1
+    except Exception as e:
+        shared["found"].value = 1
+        shared["stop"].value = 1
+        results.put(("error", f"{type(e).__name__}: {e}"))
+
+def _run_job(job, expand, table, jobs, results, shared, max_nodes):
+    """DFS below one job's root; returns the move codes of a full solution or None."""
+    prefix, move, parent, parent_acc, state, acc, key = job
+    base = len(prefix)
+    if not state & engine.PYRAMID_ALL:
+        return prefix
+    if table.visit(key, base): return None
+
+    nodes, idle, stop = shared["nodes"], shared["idle"], shared["stop"]
+    best = shared["best_left"]
+    best_left, best_codes = best.value, None
+
+    stack = [(move, state, acc, key, iter(expand(move, parent, parent_acc, state, acc)))]
+    count = flushed = 0
+    try:
+        while stack:
+            _, state, acc, key, children = stack[-1]
+            for move, child, child_acc in children:
+                count += 1
+                if not count & solvers.CHECK_MASK:
+                    with nodes.get_lock():
+                        nodes.value += count - flushed
+                        total = nodes.value
+                    flushed = count
+                    if stop.value or total > max_nodes: return None
+                    if idle.value > 0: _donate(stack, prefix, jobs, shared)
+
+                if not child & engine.PYRAMID_ALL:
+                    codes = prefix + [frame[0] for frame in stack[1:]] + [move]
+                    return codes
+
+                child_key = zobrist_update(key, state, child)
+                if table.visit(child_key, base + len(stack)): continue
+
+                if child & engine.PYRAMID_ALL != state & engine.PYRAMID_ALL:
+                    left = solvers.cards_left(child)
+                    if left < best_left:
+                        best_left = left
+                        best_codes = prefix + [frame[0] for frame in stack[1:]] + [move]
+
+                stack.append((move, child, child_acc, child_key,
+                              iter(expand(move, state, acc, child, child_acc))))
+                break
+            else:
+                stack.pop()
+        return None
+    finally:
+        with nodes.get_lock(): nodes.value += count - flushed
+        if best_codes is not None and best_left < best.value:
+            best.value = best_left
+            results.put(("partial", best_left, best_codes))
+
+def _donate(stack, prefix, jobs, shared):
+    """Hands the untried children of the shallowest frame that has any to the job queue."""
+    for depth, (_, state, acc, key, children) in enumerate(stack):
+        # Draining the frame's own iterator keeps the owner from trying them too
+        rest = list(children)
+        if not rest: continue
+
+        path = prefix + [frame[0] for frame in stack[1:depth + 1]]
+        with shared["pending"].get_lock(): shared["pending"].value += len(rest)
+        for move, child, child_acc in rest:
+            jobs.put((path + [move], move, state, acc, child, child_acc, zobrist_update(key, state, child)))
+        return
+
+# --- Parent side ---
+def solve_parallel(layout, start, max_nodes=None, stats=None, progress=None, deadline=None,
+                   workers=None, reduce=True, table_bytes=None):
+    """
+    Parallel DFS with the solvers' calling convention: returns the move
+    list or None and fills `stats` like solve_dfs (verdict, nodes, partial
+    line). `progress(nodes, pending_jobs)` and `deadline` work as in the
+    sequential solvers. `workers` defaults to every core; the shared table
+    gets `table_bytes` (config.TT_BUDGET_BYTES by default).
+    """
+    if max_nodes is None: max_nodes = config.DFS_MAX_NODES
+    workers = workers or os.cpu_count() or 1
+    verdict = solvers.UNSOLVABLE
+    moves = None
+    nodes = 1
+    best_left = solvers.cards_left(start)
+    partial = []
+
+    table = SharedTranspositionTable(table_bytes or config.TT_BUDGET_BYTES)
+    shared = {
+        "stop": multiprocessing.RawValue("b", 0),
+        "found": multiprocessing.RawValue("b", 0),
+        "best_left": multiprocessing.RawValue("i", best_left),
+        "idle": multiprocessing.Value("i", 0),
+        "pending": multiprocessing.Value("i", 0),
+        "nodes": multiprocessing.Value("q", 1),
+    }
+    jobs = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    procs = []
+
+    try:
+        if not start & engine.PYRAMID_ALL:
+            verdict = solvers.SOLVED
+            moves = []
+            return moves
+
+        if layout.stranded(start): return None
+
+        # Initial split: one job per child of the root
+        start_key = zobrist_hash(start)
+        table.visit(start_key, 0)
+        start_acc = layout.accessible(start & engine.PYRAMID_ALL)
+        children = solvers.expansion(layout, reduce)(0, start, 0, start, start_acc)
+        shared["pending"].value = len(children)
+        for move, child, child_acc in children:
+            jobs.put(([move], move, start, start_acc, child, child_acc, zobrist_update(start_key, start, child)))
+        if not children: return None
+
+        procs = [multiprocessing.Process(target=_worker, daemon=True,
+                                         args=(layout, reduce, table, jobs, results, shared, max_nodes))
+                 for _ in range(workers)]
+        for p in procs:
+            p.start()
+
+        clock = time.perf_counter
+        while True:
+            try:
+                kind, *payload = results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                kind = None
+            nodes = shared["nodes"].value
+
+            if kind == "solved":
+                verdict, moves = solvers.SOLVED, layout.moves(start, payload[0])
+                return moves
+            if kind == "error":
+                raise RuntimeError(payload[0])
+            if kind == "partial":
+                if payload[0] < best_left: best_left, partial = payload[0], layout.moves(start, payload[1])
+                continue
+            if shared["found"].value:
+                continue  # the solution is still on its way through the queue
+            if nodes > max_nodes:
+                verdict = solvers.LIMIT
+                return None
+            if shared["pending"].value == 0:
+                return None
+            if deadline is not None and clock() > deadline:
+                verdict = solvers.TIMEOUT
+                return None
+            if progress is not None: progress(nodes, shared["pending"].value)
+    finally:
+        shared["stop"].value = 1
+        for p in procs:
+            p.join(0.1)
+            if p.is_alive(): p.terminate()
+        jobs.cancel_join_thread()
+        results.cancel_join_thread()
+        if stats is not None:
+            stats["nodes"] = nodes
+            stats["verdict"] = verdict
+            stats["cards_left"] = 0 if moves is not None else best_left
+            stats["partial"] = moves if moves is not None else partial
@@ -0,0 +1,143 @@
+# portfolio.py
+# Algorithm portfolio: several solver configurations race on the same
+# position, each in its own process (search_worker.SearchProcess). The
+# first one to settle the position - a solution, or a proof that there is
+# none - wins and the others are terminated straight away. DFS and A*
+# fail on different deals, so on a multi-core machine the race finishes
+# as soon as the luckiest configuration does.
+import os
+import time
+from multiprocessing.connection import wait
+
+import config
+import search_worker
+
+NAME = "Portfolio"
+
+# Verdicts that end the race; "limit" only means that configuration gave up
+SETTLED = ("solved", "unsolvable")
+
+# (label, algorithm, solver options). The first `workers` entries race.
+CONFIGS = [
+    ("DFS", "DFS", {}),
+    ("A*", "A*", {}),
+    ("DFS shuffle 1", "DFS", {"shuffle": 1}),
+    ("A* w=5", "A*", {"weight": 5.0}),
+    ("A* complement", "A*", {"heuristic": "complement"}),
+    ("DFS shuffle 2", "DFS", {"shuffle": 2}),
+    ("A* w=1.5", "A*", {"weight": 1.5}),
+    ("DFS shuffle 3", "DFS", {"shuffle": 3}),
+]
+
+def default_configs(workers=None):
+    """One configuration per worker; past the end of CONFIGS, more DFS shuffle seeds."""
+    workers = workers or os.cpu_count() or 1
+    configs = CONFIGS[:workers]
+    for seed in range(4, 4 + workers - len(configs)):
+        configs.append((f"DFS shuffle {seed}", "DFS", {"shuffle": seed}))
+    return configs
+
+class PortfolioSearch:
+    """
+    A running race. Same interface as search_worker.SearchProcess (start,
+    poll, finished, cancel, then .result or .error), so the GUI can drive
+    either. The result dict also names the winning configuration and the
+    nodes expanded by all workers together.
+    """
+
+    def __init__(self, pyramid, stock, waste, max_nodes, configs=None):
+        self.algorithm = NAME
+        self.max_nodes = max_nodes
+        self.configs = configs or default_configs()
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self.searches = [search_worker.SearchProcess(algo, pyramid, stock, waste, max_nodes, **options)
+                         for _, algo, options in self.configs]
+        self._progress = [None] * len(self.searches)
+        self._t0 = None
+
+    def start(self):
+        self._t0 = time.perf_counter()
+        for search in self.searches:
+            search.start()
+        return self
+
+    def poll(self):
+        """Aggregated progress of all workers (or None); settles the race once it can."""
+        if self.finished(): return None
+        for i, search in enumerate(self.searches):
+            if search.finished(): continue
+            info = search.poll()
+            if info: self._progress[i] = info
+            if search.result is not None and search.result["verdict"] in SETTLED:
+                self._settle(i)
+                break
+        else:
+            if all(search.finished() for search in self.searches):
+                self._settle(None)
+
+        seen = [p for p in self._progress if p]
+        if not seen: return None
+        return {"nodes": sum(p["nodes"] for p in seen),
+                "frontier": sum(p["frontier"] for p in seen),
+                "elapsed": time.perf_counter() - self._t0}
+
+    def _settle(self, winner):
+        for search in self.searches:
+            search.cancel()
+
+        results = [s.result for s in self.searches if s.result is not None]
+        if not results:
+            self.error = "; ".join(s.error for s in self.searches if s.error) or "No worker finished"
+            return
+
+        total = sum(s.result["nodes"] if s.result else (p["nodes"] if p else 0)
+                    for s, p in zip(self.searches, self._progress))
+        if winner is None:
+            # Every configuration ran out of nodes
+            best = max(results, key=lambda r: r["nodes"])
+            self.result = dict(best, moves=None, verdict="limit", winner=None)
+        else:
+            self.result = dict(self.searches[winner].result, winner=self.configs[winner][0])
+        self.result["total_nodes"] = total
+        self.result["elapsed"] = time.perf_counter() - self._t0
+
+    def wait(self, timeout=None):
+        """Blocks until the race is settled or `timeout` seconds pass; returns finished()."""
+        end = None if timeout is None else time.perf_counter() + timeout
+        while not self.finished():
+            live = [s for s in self.searches if not s.finished()]
+            remaining = None if end is None else end - time.perf_counter()
+            if remaining is not None and remaining <= 0: break
+            wait(live, remaining)
+            self.poll()
+        return self.finished()
+
+    def finished(self):
+        return self.result is not None or self.error is not None or self.cancelled
+
+    def cancel(self):
+        if self.finished(): return
+        self.cancelled = True
+        for search in self.searches:
+            search.cancel()
+
+def solve_portfolio(layout, start, max_nodes=None, stats=None, configs=None):
+    """
+    Blocking race with the solvers' calling convention (move list or None,
+    counters in `stats`). `max_nodes` applies to each worker separately.
+    """
+    if max_nodes is None: max_nodes = config.PORTFOLIO_MAX_NODES
+    race = PortfolioSearch(*layout.to_lists(start), max_nodes, configs).start()
+    try:
+        race.wait()
+    finally:
+        race.cancel()
+    if race.error: raise RuntimeError(race.error)
+
+    res = race.result
+    if stats is not None:
+        stats.update(nodes=res["nodes"], verdict=res["verdict"], winner=res["winner"],
+                     total_nodes=res["total_nodes"])
+    return res["moves"]
@@ -0,0 +1,100 @@
+# search_worker.py
+# Runs one solver search in a child process so the Tk main loop keeps
+# running (and the GIL stays free) while it works. The GUI polls for
+# messages from its after() loop and can kill the search at any time.
+import multiprocessing
+import time
+
+import config
+import endgame
+import engine
+import solvers
+from instrument import SearchTrace
+
+# Minimum seconds between progress messages
+PROGRESS_INTERVAL = 0.1
+
+def _run_search(conn, algorithm, pyramid, stock, waste, max_nodes, timing, options):
+    """Child process entry point: streams progress, then a single result."""
+    t0 = time.perf_counter()
+    last = [0.0]
+
+    def progress(nodes, frontier):
+        now = time.perf_counter() - t0
+        if now - last[0] >= PROGRESS_INTERVAL:
+            last[0] = now
+            conn.send(("progress", {"nodes": nodes, "frontier": frontier, "elapsed": now}))
+
+    try:
+        layout, start = engine.Layout.from_lists(pyramid, stock, waste)
+        stats = {}
+        # The counters are nearly free, so every search keeps them
+        options = dict(options, trace=SearchTrace(timing=timing))
+        if "memo" not in options: options = dict(options, memo=endgame.shared(config.ENDGAME_MEMO_PATH))
+        moves = solvers.ALGORITHMS[algorithm](layout, start, max_nodes=max_nodes,
+                                              stats=stats, progress=progress, **options)
+        conn.send(("done", {"moves": moves, "nodes": stats.get("nodes", 0), "verdict": stats.get("verdict"),
+                            "trace": stats.get("trace"), "elapsed": time.perf_counter() - t0}))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+class SearchProcess:
+    """
+    One background search. poll() never blocks; cancel() terminates the
+    child process immediately. Extra keyword options go to the solver.
+    The result carries a SearchTrace summary; `timing` adds its timers.
+    """
+
+    def __init__(self, algorithm, pyramid, stock, waste, max_nodes, timing=False, **options):
+        self.algorithm = algorithm
+        self.max_nodes = max_nodes
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self._conn, child_conn = multiprocessing.Pipe(duplex=False)
+        self._proc = multiprocessing.Process(
+            target=_run_search,
+            args=(child_conn, algorithm, list(pyramid), list(stock), list(waste), max_nodes, timing, options),
+            daemon=True)
+        self._child_conn = child_conn
+
+    def start(self):
+        self._proc.start()
+        # The child owns its end now; closing ours lets recv() see EOF
+        self._child_conn.close()
+        return self
+
+    def fileno(self):
+        """Lets multiprocessing.connection.wait() block on several searches."""
+        return self._conn.fileno()
+
+    def poll(self):
+        """Returns the latest progress dict (or None) and records a result/error if one arrived."""
+        latest = None
+        try:
+            while self._conn.poll():
+                kind, payload = self._conn.recv()
+                if kind == "progress":
+                    latest = payload
+                elif kind == "done":
+                    self.result = payload
+                else:
+                    self.error = payload
+                if kind != "progress":
+                    self._proc.join(0.05)
+        except (EOFError, OSError):
+            if self.result is None and self.error is None and not self.cancelled:
+                self.error = "Search process exited unexpectedly"
+        return latest
+
+    def finished(self):
+        return self.result is not None or self.error is not None or self.cancelled
+
+    def cancel(self):
+        if self.finished(): return
+        self.cancelled = True
+        self._proc.terminate()
+        self._proc.join(0.05)
+        self._conn.close()
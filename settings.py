@@ -1,56 +1,68 @@
-import tkinter as tk
+# settings.py
+# GUI settings. Static values come from config.py; everything that depends
+# on the monitor is computed lazily, the first time the GUI needs it, so
+# importing this module never starts Tk.
 import ctypes
 
-# 1. High DPI Fix (Windows) - Prevents blurry window/wrong size
-try:
-    ctypes.windll.shcore.SetProcessDpiAwareness(1)
-except Exception:
-    try:
-        ctypes.windll.user32.SetProcessDPIAware()
-    except Exception:
-        pass
-
-# 2. Get Screen Dimensions (Hidden Window)
-# We create a temporary hidden window just to read the screen size
-_temp_root = tk.Tk()
-_temp_root.withdraw()
-
-monitor_w = _temp_root.winfo_screenwidth()
-monitor_h = _temp_root.winfo_screenheight()
-
-_temp_root.destroy()
+from config import *
 
-# 3. Define Base Design Resolution (Your original 1920x1080)
+# Design resolution the layout was drawn for (your original 1920x1080)
 BASE_W = 1920
 BASE_H = 1080
 
-# 4. Calculate Scaling Factor
-# Target 85% of screen height to ensure it fits with taskbars/title bars
-_target_h = monitor_h * 0.85
-SCALE = _target_h / BASE_H
+# Names computed by init_screen()
+SCREEN_CONSTANTS = ("monitor_w", "monitor_h", "SCALE", "SCREEN_W", "SCREEN_H",
+                    "CARD_W", "CARD_H", "PADDING_X", "PADDING_Y", "TOP_OFFSET", "SIDE_OFFSET")
 
-# ==========================================
-# DYNAMIC CONSTANTS (Calculated)
-# ==========================================
-# Note: We force int() here because Tkinter geometry crashes with floats
-
-SCREEN_W = int(BASE_W * SCALE)
-SCREEN_H = int(BASE_H * SCALE)
-
-CARD_W = int(80 * SCALE)
-CARD_H = int(115 * SCALE)
+def enable_high_dpi():
+    # High DPI Fix (Windows) - Prevents blurry window/wrong size.
+    # Must run before the first Tk window is created.
+    try:
+        ctypes.windll.shcore.SetProcessDpiAwareness(1)
+    except Exception:
+        try:
+            ctypes.windll.user32.SetProcessDPIAware()
+        except Exception:
+            pass
 
-PADDING_X = int(15 * SCALE)
-PADDING_Y = int(15 * SCALE)
-TOP_OFFSET = int(50 * SCALE)
-SIDE_OFFSET = int(50 * SCALE)
+def init_screen(root=None):
+    """
+    Reads the screen size from `root` (the app's own Tk window) and defines
+    the scaled constants. Without a root a temporary hidden window is used.
+    """
+    g = globals()
+    if root is None:
+        import tkinter as tk
+        temp_root = tk.Tk()
+        temp_root.withdraw()
+        monitor_w = temp_root.winfo_screenwidth()
+        monitor_h = temp_root.winfo_screenheight()
+        temp_root.destroy()
+    else:
+        monitor_w = root.winfo_screenwidth()
+        monitor_h = root.winfo_screenheight()
 
-# ==========================================
-# STATIC CONSTANTS
-# ==========================================
+    # Target 85% of screen height to ensure it fits with taskbars/title bars
+    scale = (monitor_h * 0.85) / BASE_H
 
-ASSET_DIR = "Carded"
+    # Note: We force int() here because Tkinter geometry crashes with floats
+    g.update(
+        monitor_w=monitor_w,
+        monitor_h=monitor_h,
+        SCALE=scale,
+        SCREEN_W=int(BASE_W * scale),
+        SCREEN_H=int(BASE_H * scale),
+        CARD_W=int(80 * scale),
+        CARD_H=int(115 * scale),
+        PADDING_X=int(15 * scale),
+        PADDING_Y=int(15 * scale),
+        TOP_OFFSET=int(50 * scale),
+        SIDE_OFFSET=int(50 * scale),
+    )
 
-AI_STEP_DELAY_MS = 600
-DFS_MAX_NODES = 200000
-ASTAR_MAX_NODES = 150000
\ No newline at end of file
+def __getattr__(name):
+    # Screen constants read before init_screen(): measure on first use
+    if name in SCREEN_CONSTANTS:
+        init_screen()
+        return globals()[name]
+    raise AttributeError(f"module 'settings' has no attribute '{name}'")
@@ -0,0 +1,159 @@
+# solution_cache.py
+# On-disk store of solver results, keyed by a canonical encoding of the
+# pyramid / stock / waste position and the algorithm that searched it.
+#
+# Backed by sqlite3 (stdlib), so lookups are a single indexed query and
+# several processes (benchmark workers) can share one file. Each row keeps
+# the move list, node count and a verdict:
+#   "solved"     - moves lead to a cleared pyramid
+#   "unsolvable" - the search space was exhausted without a solution
+#   "limit"      - the node limit ran out first (only trusted for limits
+#                  no larger than the one recorded)
+# Searches cut short by a time budget ("timeout") are not stored.
+import json
+import os
+import sqlite3
+import time
+
+import config
+import game_logic as gl
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    position  TEXT NOT NULL,
+    algorithm TEXT NOT NULL,
+    verdict   TEXT NOT NULL,
+    moves     TEXT NOT NULL,
+    nodes     INTEGER NOT NULL,
+    max_nodes INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (position, algorithm)
+);
+CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used);
+"""
+
+# Row count is only checked every this many stores
+EVICT_INTERVAL = 100
+
+def verdict_for(moves, nodes, max_nodes):
+    if moves is not None: return "solved"
+    # The solvers stop at max_nodes + 1; fewer means the space ran out
+    return "unsolvable" if nodes <= max_nodes else "limit"
+
+def position_key(pyramid, stock, waste):
+    """
+    Canonical text key for a position. Built from encode_list_for_state;
+    the "**" markers are dropped from stock and waste, since an empty waste
+    with or without the marker is the same position.
+    """
+    p = gl.encode_list_for_state(pyramid)
+    s = [n for n in gl.encode_list_for_state(stock) if n]
+    w = [n for n in gl.encode_list_for_state(waste) if n]
+    return "{}|{}|{}".format(",".join(map(str, p)), ",".join(map(str, s)), ",".join(map(str, w)))
+
+class SolutionCache:
+    """
+    Persistent result store with least-recently-used eviction once it
+    holds more than `max_entries` rows.
+    """
+
+    def __init__(self, path=None, max_entries=None):
+        self.path = path or config.SOLUTION_CACHE_PATH
+        self.max_entries = max_entries or config.SOLUTION_CACHE_MAX_ENTRIES
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+        self.stores_since_evict = 0
+        self.evict()
+
+    def close(self):
+        self.db.close()
+
+    def lookup(self, key, algorithm, max_nodes):
+        """
+        Returns {"verdict", "moves", "nodes", "max_nodes"} when the stored
+        result answers a search with this node limit, else None.
+        """
+        row = self.db.execute(
+            "SELECT verdict, moves, nodes, max_nodes FROM solutions WHERE position = ? AND algorithm = ?",
+            (key, algorithm)).fetchone()
+        if row is None: return None
+
+        verdict, moves, nodes, stored_limit = row
+        # A node-limit failure says nothing about a bigger budget
+        if verdict == "limit" and stored_limit < max_nodes: return None
+
+        with self.db:
+            self.db.execute("UPDATE solutions SET last_used = ? WHERE position = ? AND algorithm = ?",
+                            (time.time(), key, algorithm))
+        return {
+            "verdict": verdict,
+            "moves": [tuple(m) for m in json.loads(moves)],
+            "nodes": nodes,
+            "max_nodes": stored_limit,
+        }
+
+    def store(self, key, algorithm, moves, nodes, max_nodes, verdict=None):
+        """
+        Records a search result and returns its verdict: the solver's own
+        `verdict` when given, else one inferred by verdict_for().
+        """
+        verdict = verdict or verdict_for(moves, nodes, max_nodes)
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, algorithm, verdict, json.dumps(moves or []), nodes, max_nodes, time.time()))
+
+        self.stores_since_evict += 1
+        if self.stores_since_evict >= EVICT_INTERVAL:
+            self.evict()
+        return verdict
+
+    def evict(self):
+        self.stores_since_evict = 0
+        count = self.db.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+        if count <= self.max_entries: return 0
+
+        # Trim to 90% so eviction does not run on every insert
+        excess = count - int(self.max_entries * 0.9)
+        with self.db:
+            self.db.execute(
+                "DELETE FROM solutions WHERE rowid IN "
+                "(SELECT rowid FROM solutions ORDER BY last_used LIMIT ?)", (excess,))
+        return excess
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+def open_cache(path=None):
+    """SolutionCache, or None when the store cannot be opened (read-only disk etc.)."""
+    try:
+        return SolutionCache(path)
+    except (OSError, sqlite3.Error):
+        return None
+
+def solve_cached(cache, algorithm, solve, layout, start, max_nodes, **options):
+    """
+    Looks the position up before calling `solve` (solvers.solve_dfs /
+    solve_astar) and stores the outcome afterwards. `cache` may be None.
+    Returns (moves or None, nodes, verdict, from_cache).
+    """
+    key = position_key(*layout.to_lists(start))
+    if cache is not None:
+        hit = cache.lookup(key, algorithm, max_nodes)
+        if hit is not None:
+            moves = hit["moves"] if hit["verdict"] == "solved" else None
+            return moves, hit["nodes"], hit["verdict"], True
+
+    stats = {}
+    moves = solve(layout, start, max_nodes=max_nodes, stats=stats, **options)
+    nodes = stats.get("nodes", 0)
+    # A timed-out search depends on the machine it ran on; never store it
+    verdict = stats.get("verdict") or verdict_for(moves, nodes, max_nodes)
+    if cache is not None and verdict != "timeout":
+        cache.store(key, algorithm, moves, nodes, max_nodes, verdict)
+    return moves, nodes, verdict, False
@@ -1,173 +1,608 @@
 # solvers.py
 import heapq
-from models import Card
-import game_logic as gl
-import settings
+import random
+import time
+from array import array
+import engine
+import config
+import endgame
+from transposition import TranspositionTable, zobrist_hash, zobrist_update
+from heuristics import get_heuristic
 
-# --- Heuristic for A* ---
-def heuristic(pyramid):
+# Progress callbacks and the deadline clock are checked once per this
+# many nodes (a power of two, so the test is a mask)
+CHECK_EVERY = 256
+CHECK_MASK = CHECK_EVERY - 1
+
+# Search outcomes, as recorded in stats["verdict"]
+SOLVED = "solved"
+UNSOLVABLE = "unsolvable"   # every reachable state was searched
+LIMIT = "limit"             # node budget ran out
+TIMEOUT = "timeout"         # time budget ran out
+
+def cards_left(state):
+    return bin(state & engine.PYRAMID_ALL).count("1")
+
+def search(solve, layout, start, time_budget=None, **options):
     """
-    Estimates the 'cost' to finish the game from the current state.
-    Lower is better.
+    Anytime entry point, and the only one returning a dict: runs `solve`
+    (solve_dfs / solve_astar / solve_idastar) with an optional wall-clock
+    budget in seconds and returns a dict with
+      "status"  - SOLVED, UNSOLVABLE, LIMIT or TIMEOUT
+      "moves"   - the solution, or None
+      "partial" - the line reaching the fewest pyramid cards left (the
+                  solution itself when solved)
+      "cards_left", "nodes", "elapsed"
     """
-    # Base: Minimum moves needed (cards / 2)
-    cards_remaining = sum(1 for c in pyramid if c != "**")
-    h = cards_remaining / 2.0
-    
-    # Refinement: Add a small penalty for "buried" cards.
-    # This encourages the AI to pick cards that are blocking others.
-    rows = gl.pyramid_rows_from_list(pyramid)
-    blocking_penalty = 0
-    
-    # Row 0 is top, Row 6 is bottom.
-    # Cards in higher rows (0,1,2) are harder to reach.
-    for r_idx, row in enumerate(rows):
-        for card in row:
-            if card != "**":
-                blocking_penalty += (7 - r_idx) * 0.1
+    stats = {}
+    t0 = time.perf_counter()
+    deadline = t0 + time_budget if time_budget is not None else None
+    moves = solve(layout, start, deadline=deadline, stats=stats, **options)
+    return {
+        "status": stats["verdict"],
+        "moves": moves,
+        "partial": moves if moves is not None else stats["partial"],
+        "cards_left": 0 if moves is not None else stats["cards_left"],
+        "nodes": stats["nodes"],
+        "elapsed": time.perf_counter() - t0,
+    }
 
-    return h + blocking_penalty
+def probe_memo(memo, layout, state, acc, nodes, max_nodes, deadline):
+    """
+    Asks the endgame memo about `state` within the search's remaining node
+    budget and deadline. Returns (verdict, nodes): the memo's answer (a
+    tail of move codes, False or None), or TIMEOUT when its search ran
+    into the deadline, and `nodes` with the probe's own nodes added.
+    """
+    spent = memo.nodes
+    tail = memo.probe(layout, state, acc, max_nodes - nodes, deadline)
+    if memo.nodes != spent:
+        nodes += memo.nodes - spent
+        if tail is None and deadline is not None and time.perf_counter() > deadline: tail = TIMEOUT
+    return tail, nodes
 
 # --- DFS Algorithm ---
-def find_solution_dfs(pyramid, stock, waste, foundation):
+def find_solution_dfs(pyramid, stock, waste, foundation, table=None, stats=None, trace=None):
+    """
+    Move list or None. `stats` and `trace` go to solve_dfs; the
+    process-wide endgame memo settles the last few cards. Time-budgeted
+    runs go through search() instead.
+    """
+    layout, start = engine.Layout.from_lists(pyramid, stock, waste)
+    memo = endgame.shared()
+    return solve_dfs(layout, start, table=table, stats=stats, trace=trace, memo=memo)
+
+def expansion(layout, reduce, shuffle=None):
+    """
+    Child generator shared by the solvers: expand(move, parent, parent_acc,
+    state, acc) -> [(move, child, child_acc), ...]. With `reduce` the
+    engine's canonical layer applies forced kings, skips commuting pair
+    orders, drops pairs that strand a card and plays stock cards directly
+    instead of through rotates, so solution lines go through
+    layout.moves(); otherwise every legal move is returned. A `shuffle`
+    seed randomizes the child order (reproducibly for a given seed). The
+    solvers reject a stranded start before searching either way.
+    """
+    if not reduce:
+        successors = layout.successors
+        expand = lambda move, parent, parent_acc, state, acc: successors(state, acc)
+    else:
+        canonical = layout.canonical_successors
+        last_pair_gone = engine.last_pair_gone
+
+        def expand(move, parent, parent_acc, state, acc):
+            return canonical(state, acc, last_pair_gone(move, parent, state), parent_acc)
+
+    if shuffle is None: return expand
+
+    ordered = expand
+    rng_shuffle = random.Random(shuffle).shuffle
+
+    def expand(move, parent, parent_acc, state, acc):
+        children = ordered(move, parent, parent_acc, state, acc)
+        rng_shuffle(children)
+        return children
+    return expand
+
+def solve_dfs(layout, start, max_nodes=None, table=None, reduce=True, stats=None, progress=None,
+              deadline=None, shuffle=None, trace=None, memo=None):
+    """
+    Depth-first search on an explicit stack.
+
+    Each frame holds the move that entered it, its packed state/key and the
+    iterator over its children. States are immutable ints, so making a move
+    is computing the child and unmaking it is popping the frame; the move
+    list is only assembled once a solution is found.
+
+    `table` is an optional transposition.TranspositionTable; without one
+    visited states go into an unbounded set. `reduce` enables the forced-
+    move and partial-order reduction layer (see expansion()), and a
+    `shuffle` seed tries children in a random order. `progress`
+    is called as progress(nodes, frontier) every CHECK_EVERY nodes, and
+    the search gives up once time.perf_counter() passes `deadline`.
+
+    A `stats` dict, when given, receives the number of nodes expanded, the
+    verdict and the partial line that got furthest (fewest cards left).
+    An instrument.SearchTrace as `trace` collects detailed counters and
+    timings (and adds them to `stats` as "trace").
+
+    With an endgame.EndgameMemo as `memo` (and `reduce`), a position down
+    to memo.max_cards pyramid cards is a leaf: the memo either finishes
+    the line or rules the position out. Nodes the memo searches count
+    toward `max_nodes` and the reported node total.
+    """
+    if max_nodes is None: max_nodes = config.DFS_MAX_NODES
+    if not reduce: memo = None
     visited = set()
-    nodes = 0
-    max_nodes = settings.DFS_MAX_NODES
-
-    def dfs(p, s, w, f, path):
-        nonlocal nodes
-        nodes += 1
-        if nodes > max_nodes: return None
-        if gl.is_pyramid_cleared(p): return path
-
-        key = (gl.encode_list_for_state(p), gl.encode_list_for_state(s), gl.encode_list_for_state(w))
-        if key in visited: return None
-        visited.add(key)
-
-        acc = gl.get_accessible_cards(p, s, w)
-        cards = [c for c in acc if isinstance(c, Card)]
-        
-        # Identify Stock/Waste cards for the constraint check
-        sw_cards = set()
-        if len(s) > 0 and s[0] != "**": sw_cards.add(s[0])
-        if len(w) > 0 and isinstance(w[0], Card): sw_cards.add(w[0])
-
-        # 1. Kings (Can be removed from anywhere)
-        for c in cards:
-            if c.rank == 13:
-                p2, s2, w2, f2 = list(p), list(s), list(w), list(f)
-                p2, s2, w2, f2 = gl.removeCards_obj(c, "none", p2, s2, w2, f2)
-                res = dfs(p2, s2, w2, f2, path + [("king", c.number)])
-                if res: return res
-
-        # 2. Pairs
-        for i in range(len(cards)):
-            for j in range(i+1, len(cards)):
-                a, b = cards[i], cards[j]
-                
-                # CONSTRAINT: Both cards cannot be from Stock/Waste
-                if a in sw_cards and b in sw_cards:
-                    continue
-
-                if a.rank + b.rank == 13:
-                    p2, s2, w2, f2 = list(p), list(s), list(w), list(f)
-                    p2, s2, w2, f2 = gl.removeCards_obj(a, b, p2, s2, w2, f2)
-                    res = dfs(p2, s2, w2, f2, path + [("pair", a.number, b.number)])
-                    if res: return res
-
-        # 3. Rotate
-        if len(s) > 0 or (len(w) > 0 and w[0] != "**"):
-            p2, s2, w2, f2 = list(p), list(s), list(w), list(f)
-            s2, w2 = gl.stock_rotate(s2, w2)
-            res = dfs(p2, s2, w2, f2, path + [("rotate",)])
-            if res: return res
-            
-        return None
+    expand = expansion(layout, reduce, shuffle)
+    z_update = zobrist_update
+    visit = table.visit if table else None
+    clock = time.perf_counter
+    if trace is not None:
+        trace.begin()
+        expand = trace.timed("movegen", expand)
+        z_update = trace.timed("hashing", z_update)
+        if table: visit = trace.timed("hashing", visit)
+
+    nodes = 1
+    verdict = UNSOLVABLE
+    best_left = cards_left(start)
+    best_codes = []
+    stack = []
+    try:
+        if not start & engine.PYRAMID_ALL:
+            verdict = SOLVED
+            return []
+        if layout.stranded(start): return None
+        start_acc = layout.accessible(start & engine.PYRAMID_ALL)
+        if memo is not None:
+            tail, nodes = probe_memo(memo, layout, start, start_acc, nodes, max_nodes, deadline)
+            if tail is False: return None
+            if tail == TIMEOUT:
+                verdict = TIMEOUT
+                return None
+            if tail is not None:
+                verdict = SOLVED
+                return layout.moves(start, tail)
+        start_key = zobrist_hash(start) if table else start
+        if table is None:
+            visited.add(start)
+        else:
+            table.visit(start_key, 0)
+
+        kids = expand(0, start, 0, start, start_acc)
+        if trace is not None: trace.expand(0, 1, start, kids)
+        stack = [(None, start, start_acc, start_key, iter(kids))]
 
-    return dfs(list(pyramid), list(stock), list(waste), list(foundation), [])
+        while stack:
+            _, state, acc, key, children = stack[-1]
+            for move, child, child_acc in children:
+                nodes += 1
+                if not nodes & CHECK_MASK:
+                    if progress is not None: progress(nodes, len(stack))
+                    if deadline is not None and clock() > deadline:
+                        verdict = TIMEOUT
+                        return None
+                if nodes > max_nodes:
+                    verdict = LIMIT
+                    return None
+                if not child & engine.PYRAMID_ALL:
+                    verdict = SOLVED
+                    codes = [frame[0] for frame in stack[1:]] + [move]
+                    return layout.moves(start, codes)
+
+                if table is None:
+                    if child in visited:
+                        if trace is not None: trace.duplicate(len(stack), child)
+                        continue
+                    visited.add(child)
+                    child_key = child
+                else:
+                    child_key = z_update(key, state, child)
+                    if visit(child_key, len(stack)):
+                        if trace is not None: trace.duplicate(len(stack), child)
+                        continue
+
+                if child & engine.PYRAMID_ALL != state & engine.PYRAMID_ALL:
+                    left = cards_left(child)
+                    if left < best_left:
+                        best_left = left
+                        best_codes = [frame[0] for frame in stack[1:]] + [move]
+
+                if memo is not None:
+                    tail, nodes = probe_memo(memo, layout, child, child_acc, nodes, max_nodes, deadline)
+                    if tail is False: continue
+                    if tail == TIMEOUT:
+                        verdict = TIMEOUT
+                        return None
+                    if tail is not None:
+                        verdict = SOLVED
+                        codes = [frame[0] for frame in stack[1:]] + [move] + tail
+                        return layout.moves(start, codes)
+
+                kids = expand(move, state, acc, child, child_acc)
+                if trace is not None: trace.expand(len(stack), len(stack) + 1, child, kids)
+                stack.append((move, child, child_acc, child_key, iter(kids)))
+                break
+            else:
+                stack.pop()
+
+        return None
+    finally:
+        if stats is not None:
+            stats["nodes"] = nodes
+            stats["verdict"] = verdict
+            stats["cards_left"] = best_left
+            stats["partial"] = layout.moves(start, best_codes)
+        if memo is not None: memo.flush()
+        if trace is not None:
+            trace.end()
+            if stats is not None: stats["trace"] = trace.as_dict()
 
 # --- A* Algorithm ---
-def find_solution_astar(pyramid, stock, waste, foundation):
-    max_nodes = settings.ASTAR_MAX_NODES
-    
-    # HEURISTIC WEIGHT
-    # Higher = Greedier (Faster, maybe less optimal steps)
-    H_WEIGHT = 2.5 
+# HEURISTIC WEIGHT
+# Higher = Greedier (Faster, maybe less optimal steps)
+H_WEIGHT = 2.5
 
-    start_node = (list(pyramid), list(stock), list(waste), list(foundation))
-    start_h = heuristic(pyramid)
-    
-    # Priority Queue: (f_score, tie_breaker, g_score, state_tuple, path)
-    counter = 0 
-    pq = []
-    
-    start_f = 0 + (start_h * H_WEIGHT)
-    
-    heapq.heappush(pq, (start_f, counter, 0, start_node, []))
+# Heap entries are single ints: f (fixed point) above the node index
+F_SCALE = 1000
+IDX_BITS = 32
+IDX_MASK = (1 << IDX_BITS) - 1
+
+def find_solution_astar(pyramid, stock, waste, foundation, table=None, heuristic=None, stats=None, trace=None):
+    """
+    Move list or None. `stats` and `trace` go to solve_astar; the
+    process-wide endgame memo settles the last few cards. Time-budgeted
+    runs go through search() instead.
+    """
+    layout, start = engine.Layout.from_lists(pyramid, stock, waste)
+    memo = endgame.shared()
+    return solve_astar(layout, start, table=table, heuristic=heuristic, stats=stats, trace=trace, memo=memo)
+
+def solve_astar(layout, start, max_nodes=None, table=None, heuristic=None, reduce=True, stats=None,
+                progress=None, deadline=None, weight=None, trace=None, memo=None):
+    """
+    Weighted A* over a flat node store.
+
+    Node i lives in parallel arrays (packed state, accessible mask, parent
+    index, g, move code); the heap only holds int priorities with the node
+    index in the low bits. A child is dropped at push time when an equal or
+    better g is already known for its state, via the best-g map, or via
+    `table` (a transposition.TranspositionTable) when one is given.
+
+    `heuristic` is a heuristics.Heuristic or a registered name ("rows" by
+    default); children get their estimate from the parent's via update()
+    and f = g + weight * h (H_WEIGHT unless `weight` is given).
+    `reduce` enables the forced-move and partial-order reduction layer.
+    `progress`, `deadline`, `stats`, `trace` and `memo` work as in
+    solve_dfs (the memo is asked about each child as it is generated); the
+    partial line is the path to the expanded node with the fewest cards left.
+    """
+    if max_nodes is None: max_nodes = config.ASTAR_MAX_NODES
+    if not reduce: memo = None
+    if weight is None: weight = H_WEIGHT
+
+    # Node store
+    n_state = array("Q")
+    n_acc = array("I")
+    n_parent = array("i")
+    n_g = array("H")
+    n_move = array("H")
+    n_h = array("d")
+    n_key = array("Q") if table else n_state
+
+    def add_node(state, acc, parent, g, move, key, h):
+        n_state.append(state)
+        n_h.append(h)
+        n_acc.append(acc)
+        n_parent.append(parent)
+        n_g.append(g)
+        n_move.append(move)
+        if table: n_key.append(key)
+        return len(n_state) - 1
+
+    def codes_to(idx):
+        codes = []
+        while n_parent[idx] >= 0:
+            codes.append(n_move[idx])
+            idx = n_parent[idx]
+        return codes[::-1]
+
+    def path_to(idx):
+        return layout.moves(start, codes_to(idx))
+
+    # Priority: f scaled to an int, node index as tie-breaker (FIFO on ties)
+    def priority(f, idx):
+        return (int(f * F_SCALE + 0.5) << IDX_BITS) | idx
+
+    h_fn = get_heuristic(heuristic).bind(layout)
+    h_update = h_fn.update
+    expand = expansion(layout, reduce)
+    z_update = zobrist_update
+    visit = table.visit if table else None
+    if trace is not None:
+        trace.begin()
+        expand = trace.timed("movegen", expand)
+        h_update = trace.timed("heuristic", h_update)
+        z_update = trace.timed("hashing", z_update)
+        if table: visit = trace.timed("hashing", visit)
+
+    start_h = h_fn.initial(start)
+    start_acc = layout.accessible(start & engine.PYRAMID_ALL)
+    start_key = zobrist_hash(start) if table else start
+
+    best_g = {}
+    if table is None:
+        best_g[start_key] = 0
+    else:
+        table.visit(start_key, 0)
+    pq = [priority(0 + (start_h * weight), add_node(start, start_acc, -1, 0, 0, start_key, start_h))]
     
-    visited = set()
     nodes_visited = 0
+    clock = time.perf_counter
+    verdict = UNSOLVABLE
+    best_left = cards_left(start)
+    best_idx = 0
+
+    try:
+        if layout.stranded(start): return None
+        if memo is not None:
+            tail, nodes_visited = probe_memo(memo, layout, start, start_acc, nodes_visited, max_nodes, deadline)
+            if tail is False: return None
+            if tail == TIMEOUT:
+                verdict = TIMEOUT
+                return None
+            if tail is not None:
+                verdict = SOLVED
+                return layout.moves(start, tail)
+        while pq:
+            idx = heapq.heappop(pq) & IDX_MASK
+            state = n_state[idx]
+            g = n_g[idx]
+            key = n_key[idx]
+
+            # Stale entry: a better path to this state was pushed after it
+            if (best_g[key] if table is None else table.lookup(key)) < g:
+                if trace is not None: trace.stale_pop(g, state)
+                continue
+
+            nodes_visited += 1
+            if not nodes_visited & CHECK_MASK:
+                if progress is not None: progress(nodes_visited, len(pq))
+                if deadline is not None and clock() > deadline:
+                    verdict = TIMEOUT
+                    return None
+            if nodes_visited > max_nodes:
+                verdict = LIMIT
+                return None
+
+            if not state & engine.PYRAMID_ALL:
+                verdict = SOLVED
+                return path_to(idx)
+
+            left = cards_left(state)
+            if left < best_left:
+                best_left, best_idx = left, idx
+
+            parent = n_parent[idx]
+            if parent >= 0:
+                children = expand(n_move[idx], n_state[parent], n_acc[parent], state, n_acc[idx])
+            else:
+                children = expand(0, state, 0, state, n_acc[idx])
+            if trace is not None: trace.expand(g, len(pq), state, children)
 
-    while pq:
-        f, _, g, state, path = heapq.heappop(pq)
-        p, s, w, fd = state
-        
-        nodes_visited += 1
-        if nodes_visited > max_nodes: return None
-
-        if gl.is_pyramid_cleared(p): return path
-
-        state_key = (gl.encode_list_for_state(p), gl.encode_list_for_state(s), gl.encode_list_for_state(w))
-        if state_key in visited: continue
-        visited.add(state_key)
-
-        acc = gl.get_accessible_cards(p, s, w)
-        cards = [c for c in acc if isinstance(c, Card)]
-        
-        # Identify Stock/Waste cards for the constraint check
-        sw_cards = set()
-        if len(s) > 0 and s[0] != "**": sw_cards.add(s[0])
-        if len(w) > 0 and isinstance(w[0], Card): sw_cards.add(w[0])
-        
-        moves = []
-
-        # 1. Kings
-        for c in cards:
-            if c.rank == 13:
-                p2, s2, w2, f2 = list(p), list(s), list(w), list(fd)
-                p2, s2, w2, f2 = gl.removeCards_obj(c, "none", p2, s2, w2, f2)
-                moves.append((("king", c.number), (p2, s2, w2, f2)))
-
-        # 2. Pairs
-        for i in range(len(cards)):
-            for j in range(i+1, len(cards)):
-                a, b = cards[i], cards[j]
-                
-                
-                if a in sw_cards and b in sw_cards:
-                    continue
-
-                if a.rank + b.rank == 13:
-                    p2, s2, w2, f2 = list(p), list(s), list(w), list(fd)
-                    p2, s2, w2, f2 = gl.removeCards_obj(a, b, p2, s2, w2, f2)
-                    moves.append((("pair", a.number, b.number), (p2, s2, w2, f2)))
-
-        # 3. Rotate
-        if len(s) > 0 or (len(w) > 0 and w[0] != "**"):
-             p2, s2, w2, f2 = list(p), list(s), list(w), list(fd)
-             s2, w2 = gl.stock_rotate(s2, w2)
-             moves.append((("rotate",), (p2, s2, w2, f2)))
-
-        for move_action, next_state in moves:
-            p_next = next_state[0]
             new_g = g + 1
-            new_h = heuristic(p_next)
+            h = n_h[idx]
+            for move, next_state, next_acc in children:
+                if table is None:
+                    new_key = next_state
+                    known = best_g.get(new_key)
+                    if known is not None and known <= new_g:
+                        if trace is not None: trace.duplicate(new_g, next_state)
+                        continue
+                    best_g[new_key] = new_g
+                else:
+                    new_key = z_update(key, state, next_state)
+                    if visit(new_key, new_g):
+                        if trace is not None: trace.duplicate(new_g, next_state)
+                        continue
+
+                if memo is not None:
+                    tail, nodes_visited = probe_memo(memo, layout, next_state, next_acc, nodes_visited, max_nodes,
+                                                     deadline)
+                    if tail is False: continue
+                    if tail == TIMEOUT:
+                        verdict = TIMEOUT
+                        return None
+                    if tail is not None:
+                        verdict = SOLVED
+                        return layout.moves(start, codes_to(idx) + [move] + tail)
+
+                new_h = h_update(h, state, next_state)
             
-            # Apply Weight
-            new_f = new_g + (new_h * H_WEIGHT)
+                # Apply Weight
+                new_f = new_g + (new_h * weight)
             
-            counter += 1
-            new_path = path + [move_action]
-            heapq.heappush(pq, (new_f, counter, new_g, next_state, new_path))
+                child = add_node(next_state, next_acc, idx, new_g, move, new_key, new_h)
+                heapq.heappush(pq, priority(new_f, child))
             
-    return None
\ No newline at end of file
+        return None
+    finally:
+        if stats is not None:
+            stats["nodes"] = nodes_visited
+            stats["verdict"] = verdict
+            stats["cards_left"] = best_left
+            stats["partial"] = path_to(best_idx)
+        if memo is not None: memo.flush()
+        if trace is not None:
+            trace.end()
+            if stats is not None: stats["trace"] = trace.as_dict()
+
+# --- IDA* Algorithm ---
+def find_solution_idastar(pyramid, stock, waste, foundation, table=None, heuristic=None, stats=None, trace=None):
+    """
+    Move list or None. `stats` and `trace` go to solve_idastar; the
+    process-wide endgame memo settles the last few cards. Time-budgeted
+    runs go through search() instead.
+    """
+    layout, start = engine.Layout.from_lists(pyramid, stock, waste)
+    memo = endgame.shared()
+    return solve_idastar(layout, start, table=table, heuristic=heuristic, stats=stats, trace=trace, memo=memo)
+
+def solve_idastar(layout, start, max_nodes=None, table=None, heuristic=None, reduce=True, stats=None,
+                  progress=None, deadline=None, weight=None, trace=None, memo=None):
+    """
+    Iterative-deepening A*: depth-first passes that cut off every child
+    whose f = g + weight * h is above the pass's bound; the next pass uses
+    the smallest f that was cut off. A pass that cuts nothing off and
+    finds no solution proves the deal unsolvable.
+
+    Memory stays proportional to the solution depth: the explicit stack
+    holds one frame per move (with that node's children, ordered by
+    increasing h), and duplicates are only checked against the states on
+    the current path and in `table`, a transposition.TranspositionTable
+    (so bounded by its byte budget; by default a new one of
+    config.IDASTAR_TT_BUDGET_BYTES, none when that is 0). The table is
+    cleared at the start of each pass and skips states already reached
+    in that pass with an equal or smaller g.
+
+    `heuristic` and `weight` work as in solve_astar; `max_nodes` counts
+    expansions over all passes. `reduce`, `progress`, `deadline`,
+    `stats`, `trace` and `memo` work as in solve_dfs.
+    """
+    if max_nodes is None: max_nodes = config.IDASTAR_MAX_NODES
+    if weight is None: weight = H_WEIGHT
+    if not reduce: memo = None
+    if table is None and config.IDASTAR_TT_BUDGET_BYTES:
+        table = TranspositionTable(config.IDASTAR_TT_BUDGET_BYTES, config.TT_POLICY)
+
+    h_fn = get_heuristic(heuristic).bind(layout)
+    h_update = h_fn.update
+    expand = expansion(layout, reduce)
+    z_update = zobrist_update
+    visit = table.visit if table else None
+    clock = time.perf_counter
+    if trace is not None:
+        trace.begin()
+        expand = trace.timed("movegen", expand)
+        h_update = trace.timed("heuristic", h_update)
+        z_update = trace.timed("hashing", z_update)
+        if table: visit = trace.timed("hashing", visit)
+
+    def ordered_children(move, parent, parent_acc, state, acc, h):
+        """(h, move, child, child_acc) for each child, most promising first."""
+        kids = [(h_update(h, state, child), move, child, child_acc)
+                for move, child, child_acc in expand(move, parent, parent_acc, state, acc)]
+        kids.sort(key=lambda kid: kid[0])
+        return kids
+
+    nodes = 0
+    verdict = UNSOLVABLE
+    best_left = cards_left(start)
+    best_codes = []
+    stack = []
+    try:
+        if not start & engine.PYRAMID_ALL:
+            verdict = SOLVED
+            return []
+        if layout.stranded(start): return None
+        start_acc = layout.accessible(start & engine.PYRAMID_ALL)
+        if memo is not None:
+            tail, nodes = probe_memo(memo, layout, start, start_acc, nodes, max_nodes, deadline)
+            if tail is False: return None
+            if tail == TIMEOUT:
+                verdict = TIMEOUT
+                return None
+            if tail is not None:
+                verdict = SOLVED
+                return layout.moves(start, tail)
+        start_h = h_fn.initial(start)
+        start_key = zobrist_hash(start) if table else start
+        bound = start_h * weight
+
+        while True:
+            if table: table.clear(); table.visit(start_key, 0)
+            on_path = {start}
+            next_bound = None
+            nodes += 1
+            kids = ordered_children(0, start, 0, start, start_acc, start_h)
+            if trace is not None: trace.expand(0, 1, start, kids)
+            stack = [(None, start, start_acc, start_key, iter(kids))]
+
+            while stack:
+                _, state, acc, key, children = stack[-1]
+                g = len(stack)
+                for child_h, move, child, child_acc in children:
+                    f = g + child_h * weight
+                    if f > bound:
+                        if next_bound is None or f < next_bound: next_bound = f
+                        continue
+                    if not child & engine.PYRAMID_ALL:
+                        verdict = SOLVED
+                        return layout.moves(start, [frame[0] for frame in stack[1:]] + [move])
+
+                    if child in on_path:
+                        if trace is not None: trace.duplicate(g, child)
+                        continue
+                    child_key = child
+                    if table:
+                        child_key = z_update(key, state, child)
+                        if visit(child_key, g):
+                            if trace is not None: trace.duplicate(g, child)
+                            continue
+
+                    if child & engine.PYRAMID_ALL != state & engine.PYRAMID_ALL:
+                        left = cards_left(child)
+                        if left < best_left:
+                            best_left = left
+                            best_codes = [frame[0] for frame in stack[1:]] + [move]
+
+                    if memo is not None:
+                        tail, nodes = probe_memo(memo, layout, child, child_acc, nodes, max_nodes, deadline)
+                        if tail is False: continue
+                        if tail == TIMEOUT:
+                            verdict = TIMEOUT
+                            return None
+                        if tail is not None:
+                            verdict = SOLVED
+                            return layout.moves(start, [frame[0] for frame in stack[1:]] + [move] + tail)
+
+                    nodes += 1
+                    if not nodes & CHECK_MASK:
+                        if progress is not None: progress(nodes, len(stack))
+                        if deadline is not None and clock() > deadline:
+                            verdict = TIMEOUT
+                            return None
+                    if nodes > max_nodes:
+                        verdict = LIMIT
+                        return None
+
+                    kids = ordered_children(move, state, acc, child, child_acc, child_h)
+                    if trace is not None: trace.expand(g, g + 1, child, kids)
+                    stack.append((move, child, child_acc, child_key, iter(kids)))
+                    on_path.add(child)
+                    break
+                else:
+                    stack.pop()
+                    on_path.discard(state)
+
+            # Nothing was cut off: the whole space has been searched
+            if next_bound is None: return None
+            bound = next_bound
+    finally:
+        if stats is not None:
+            stats["nodes"] = nodes
+            stats["verdict"] = verdict
+            stats["cards_left"] = best_left
+            stats["partial"] = layout.moves(start, best_codes)
+        if memo is not None: memo.flush()
+        if trace is not None:
+            trace.end()
+            if stats is not None: stats["trace"] = trace.as_dict()
+
+# Algorithm name (as shown in the GUI) -> search function on a packed state
+ALGORITHMS = {
+    "DFS": solve_dfs,
+    "A*": solve_astar,
+    "IDA*": solve_idastar,
+}
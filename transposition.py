@@ -0,0 +1,225 @@
+# transposition.py
+# Fixed-budget transposition table keyed by 64-bit Zobrist hashes.
+#
+# The solvers' plain `visited` sets grow without bound. This table lives in
+# preallocated arrays sized from a byte budget, so a search never holds
+# more than the budget no matter how many nodes it expands. When a bucket
+# is full an entry is evicted according to the replacement policy.
+import random
+from array import array
+
+import engine
+
+# --- Zobrist keys ---
+# One random 64-bit key per bit of the packed engine state (pyramid slots,
+# removed stock cards and cursor bits). A fixed seed keeps hashes identical
+# across processes.
+STATE_BITS = engine.CURSOR_SHIFT + 5
+_rng = random.Random(0x50AA1D)
+ZOBRIST = [_rng.getrandbits(64) for _ in range(STATE_BITS)]
+del _rng
+
+
+def zobrist_hash(state):
+    h = 0
+    while state:
+        low = state & -state
+        h ^= ZOBRIST[low.bit_length() - 1]
+        state ^= low
+    return h
+
+
+def zobrist_update(h, parent, child):
+    """Incremental hash of `child`: only the bits a move flipped are folded in."""
+    diff = parent ^ child
+    while diff:
+        low = diff & -diff
+        h ^= ZOBRIST[low.bit_length() - 1]
+        diff ^= low
+    return h
+
+
+# --- Table ---
+# Per entry: 8-byte key, 4-byte depth, 4-byte recency stamp
+ENTRY_BYTES = 16
+BUCKET_WAYS = 2
+POLICIES = ("depth", "lru")
+MISSING_DEPTH = 0x7FFFFFFF
+
+
+class TranspositionTable:
+    """
+    Two-way set-associative table of (key, depth) entries.
+
+    policy="depth" keeps the entry reached closest to the root (its subtree
+    is the larger one to skip); policy="lru" evicts the least recently
+    touched entry of the bucket.
+    """
+
+    def __init__(self, budget_bytes, policy="depth"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown replacement policy: {policy}")
+        self.policy = policy
+
+        # Largest power-of-two bucket count that fits the budget
+        buckets = 1
+        while buckets * 2 * BUCKET_WAYS * ENTRY_BYTES <= budget_bytes:
+            buckets *= 2
+        self.size = buckets * BUCKET_WAYS
+        self.bucket_mask = buckets - 1
+        self.budget_bytes = budget_bytes
+
+        self.keys = array("Q", bytes(8 * self.size))
+        self.depths = array("i", bytes(4 * self.size))
+        self.stamps = array("I", bytes(4 * self.size))
+        self.clock = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def clear(self):
+        for arr in (self.keys, self.depths, self.stamps):
+            arr[:] = array(arr.typecode, bytes(arr.itemsize * self.size))
+        self.clock = 0
+        self.hits = self.misses = self.stores = self.evictions = 0
+
+    def visit(self, key, depth):
+        """
+        Returns True when `key` is already stored at a depth <= `depth`
+        (the caller can prune). Otherwise records it and returns False.
+        """
+        key = key or 1  # 0 marks an empty slot
+        self.clock = (self.clock + 1) & 0xFFFFFFFF
+        keys = self.keys
+        i = (key & self.bucket_mask) * BUCKET_WAYS
+        j = i + 1
+
+        for s in (i, j):
+            if keys[s] == key:
+                self.stamps[s] = self.clock
+                if self.depths[s] <= depth:
+                    self.hits += 1
+                    return True
+                # Reached by a shorter path this time: keep the better depth
+                self.misses += 1
+                self.depths[s] = depth
+                return False
+
+        self.misses += 1
+        self.stores += 1
+        if not keys[i]:
+            victim = i
+        elif not keys[j]:
+            victim = j
+        else:
+            self.evictions += 1
+            if self.policy == "depth":
+                di, dj = self.depths[i], self.depths[j]
+                if di == dj:
+                    victim = i if self.stamps[i] <= self.stamps[j] else j
+                else:
+                    victim = i if di > dj else j
+            else:
+                victim = i if self.stamps[i] <= self.stamps[j] else j
+
+        keys[victim] = key
+        self.depths[victim] = depth
+        self.stamps[victim] = self.clock
+        return False
+
+    def lookup(self, key):
+        """Stored depth for `key`, or a large sentinel when it is not in the table."""
+        key = key or 1
+        i = (key & self.bucket_mask) * BUCKET_WAYS
+        if self.keys[i] == key: return self.depths[i]
+        if self.keys[i + 1] == key: return self.depths[i + 1]
+        return MISSING_DEPTH
+
+    def stats(self):
+        used = sum(1 for k in self.keys if k)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": used,
+            "capacity": self.size,
+            "bytes": self.size * ENTRY_BYTES,
+        }
+
+
+# --- Shared table ---
+# Per entry: 8-byte check word, 4-byte depth
+SHARED_ENTRY_BYTES = 12
+
+
+class SharedTranspositionTable:
+    """
+    Two-way table in shared memory for a search split across processes
+    (see parallel.py). Build it before the workers start and hand it to
+    them as a Process argument.
+
+    There are no locks. Each entry stores key ^ depth beside the depth and
+    a reader only trusts an entry whose two words agree, so a write torn
+    by another process reads as a miss: the subtree is searched twice,
+    never wrongly skipped. The first slot of a bucket keeps the entry
+    closest to the root, the second always takes the newest.
+    """
+
+    def __init__(self, budget_bytes):
+        buckets = 1
+        while buckets * 2 * BUCKET_WAYS * SHARED_ENTRY_BYTES <= budget_bytes:
+            buckets *= 2
+        self.size = buckets * BUCKET_WAYS
+        self.bucket_mask = buckets - 1
+        self.budget_bytes = budget_bytes
+
+        # Imported here: multiprocessing is slow to import and only the
+        # parallel search needs shared memory
+        from multiprocessing.sharedctypes import RawArray
+        self.checks = RawArray("Q", self.size)
+        self.depths = RawArray("i", self.size)
+        self._bind()
+
+    def _bind(self):
+        # memoryviews index much faster than the ctypes arrays themselves
+        self._checks = memoryview(self.checks).cast("B").cast("Q")
+        self._depths = memoryview(self.depths).cast("B").cast("i")
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_checks"], state["_depths"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._bind()
+
+    def visit(self, key, depth):
+        """Same contract as TranspositionTable.visit."""
+        key = key or 1
+        checks, depths = self._checks, self._depths
+        i = (key & self.bucket_mask) * BUCKET_WAYS
+
+        for s in (i, i + 1):
+            d = depths[s]
+            if checks[s] ^ d == key:
+                if d <= depth: return True
+                depths[s] = depth
+                checks[s] = key ^ depth
+                return False
+
+        s = i if not checks[i] or depths[i] > depth else i + 1
+        depths[s] = depth
+        checks[s] = key ^ depth
+        return False
+
+    def lookup(self, key):
+        key = key or 1
+        i = (key & self.bucket_mask) * BUCKET_WAYS
+        for s in (i, i + 1):
+            d = self._depths[s]
+            if self._checks[s] ^ d == key: return d
+        return MISSING_DEPTH